@@ -0,0 +1,72 @@
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+"""
+Import-time regression benchmark. Times 'import vfs' in fresh interpreters and
+checks that heavy optional dependencies are not imported along with it, as
+they are meant to load lazily on first use.
+
+    $ python benchmarks/import_time.py --output import.json
+    $ python benchmarks/import_time.py --baseline import.json --tolerance 0.25
+"""
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Modules which 'import vfs' must not pull in
+LAZY_MODULES = ['torch', 'pandarallel', 'sklearn', 'scipy']
+
+PROBE = f"""
+import sys, time, json
+sys.path.insert(0, {ROOT!r})
+tic = time.perf_counter()
+import vfs
+toc = time.perf_counter() - tic
+print(json.dumps({{'seconds': toc, 'loaded': [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def measure(repeat: int) -> dict:
+    """ Runs the import probe 'repeat' times, each in a new interpreter.
+    """
+    runs = [json.loads(subprocess.check_output([sys.executable, '-c', PROBE])) for __ in range(repeat)]
+    times = [run['seconds'] for run in runs]
+    return {
+        'python': sys.version.split()[0],
+        'repeat': repeat,
+        'median_seconds': statistics.median(times),
+        'min_seconds': min(times),
+        'eagerly_loaded': sorted({mod for run in runs for mod in run['loaded']}),
+    }
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Import-time regression benchmark for vfs.')
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--output', help='write results to this json file')
+    parser.add_argument('--baseline', help='compare against results from this json file')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown')
+    args = parser.parse_args()
+
+    result = measure(args.repeat)
+    print(json.dumps(result, indent=2))
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(result, fh, indent=2)
+
+    # Fail on eager heavy imports, or on slowdowns wrt the baseline
+    failures = [f'eagerly imported: {mod}' for mod in result['eagerly_loaded']]
+    if args.baseline:
+        with open(args.baseline) as fh:
+            base = json.load(fh)['median_seconds']
+        if result['median_seconds'] > base * (1 + args.tolerance):
+            failures.append(f"import took {result['median_seconds']:.3f}s, baseline {base:.3f}s")
+
+    for failure in failures:
+        print('REGRESSION:', failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
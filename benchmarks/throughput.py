@@ -0,0 +1,179 @@
+import os
+import sys
+import json
+import time
+import argparse
+import math
+import resource
+import platform
+import itertools
+import importlib.util
+import statistics
+import subprocess
+import multiprocessing
+import numpy as np
+import pandas as pd
+
+"""
+Throughput and memory benchmark of the MI engines and the selectors, on
+synthetic datasets of any size. Every case runs in a fresh process, so that
+its peak RSS is its own, and is timed over a few repeats. Grids of rows and
+columns give scaling curves. Results are stored as json, and compared against
+those of a previous version to catch regressions.
+
+    $ python benchmarks/throughput.py --rows 1000 10000 100000 --output bench.json
+    $ python benchmarks/throughput.py --rows 1000 10000 100000 --baseline bench.json
+    $ python benchmarks/throughput.py --cases mi_frame forward --losses mim jmim --cols 16 64
+"""
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+CASES = ['mi_frame', 'mi_tensor', 'forward', 'backward', 'exhaustive']
+LOSSES = ['mim', 'jmi', 'jmim', 'mrmr', 'njmim', 'disr']
+
+
+def df_synthetic(n_rows: int, n_cols: int, n_informative=3, n_redundant=2, seed=0):
+    """ Gaussian features and a target driven by the first 'n_informative' of
+    them, half linearly and half through pairwise interactions, followed by
+    'n_redundant' noisy copies of informative features. The remaining columns
+    are pure noise. Returns the dataframe, feature and target names.
+    """
+    rng = np.random.default_rng(seed)
+    n_informative = min(n_informative, n_cols)
+    n_redundant = min(n_redundant, n_cols - n_informative)
+    values = rng.normal(size=(n_rows, n_cols))
+
+    informative = values[:, :n_informative]
+    linear, paired = informative[:, ::2], informative[:, 1::2]
+    target = linear.sum(axis=1) + (paired * np.roll(paired, 1, axis=1)).sum(axis=1)
+    for jj in range(n_redundant):
+        values[:, n_informative + jj] = informative[:, jj % n_informative] + rng.normal(scale=.3, size=n_rows)
+
+    features = [f'F{jj}' for jj in range(n_cols)]
+    df = pd.DataFrame(values, columns=features)
+    df['T'] = target + rng.normal(scale=.5, size=n_rows)
+    return df, features, ['T']
+
+
+def run_case(case: str, loss: str, n_rows: int, n_cols: int, n_bins: int, k: int, repeat: int) -> dict:
+    """ Builds the dataset and times one case on it, in the calling process.
+    Engines are timed on a fixed workload of MI calls (including prebinning,
+    reported apart), selectors on a whole selection.
+    """
+    import vfs
+    df, features, targets = df_synthetic(n_rows, n_cols)
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    def timed(fun):
+        times = []
+        for __ in range(repeat):
+            tic = time.perf_counter()
+            value = fun()
+            times.append(time.perf_counter() - tic)
+        return statistics.median(times), value
+
+    if case in ('mi_frame', 'mi_tensor'):
+        # Single features, pairs and all of them, vs the targets
+        engine = vfs.mi_frame if case == 'mi_frame' else lambda df, n_bins : vfs.mi_tensor(df, n_bins, gpu=False)
+        queries = [[ff] for ff in features] + [list(pair) for pair in zip(features, features[1:])] + [features]
+        prebinning, mi_fun = timed(lambda : engine(df, n_bins=n_bins))
+        seconds, __ = timed(lambda : [mi_fun(qq, targets) for qq in queries])
+        work = {'prebinning_seconds': prebinning, 'calls': len(queries), 'calls_per_second': len(queries) / seconds}
+        selected = None
+    else:
+        mi_fun = vfs.mi_frame(df, n_bins=n_bins)
+        if case == 'forward':
+            run = lambda : vfs.forward_selector(df, features, targets, k, loss=getattr(vfs, loss), mi_fun=mi_fun)
+        elif case == 'backward':
+            run = lambda : vfs.backward_eliminator(df, features, targets, k, loss=getattr(vfs, loss), mi_fun=mi_fun)
+        else:
+            run = lambda : vfs.exhaustive_searcher(df, features, targets, k, mi_fun=mi_fun, pbar=False)
+        seconds, result = timed(run)
+        selected = list(result[1])
+        work = {'subsets': math.comb(n_cols, k) if case == 'exhaustive' else None}
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'case': case, 'loss': loss, 'rows': n_rows, 'cols': n_cols, 'n_bins': n_bins, 'k': k,
+        'seconds': seconds, 'rows_per_second': n_rows / seconds, **work, 'selected': selected,
+        'base_rss_mb': base_rss / 1024, 'peak_rss_mb': peak_rss / 1024,
+    }
+
+
+def isolated(*args) -> dict:
+    """ Runs a case in a new process, so its peak RSS is not polluted by others.
+    """
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        return pool.apply(run_case, args)
+
+
+def environment() -> dict:
+    """ Versions the results were obtained with, to compare like with like.
+    """
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(), 'numpy': np.__version__,
+            'pandas': pd.__version__, 'machine': platform.machine(), 'cpus': os.cpu_count()}
+
+
+def key(result: dict) -> tuple:
+    return tuple(result[kk] for kk in ('case', 'loss', 'rows', 'cols', 'n_bins', 'k'))
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Throughput and memory benchmark for vfs.')
+    parser.add_argument('--cases', nargs='+', default=CASES, choices=CASES)
+    parser.add_argument('--losses', nargs='+', default=['mim', 'jmim'], choices=LOSSES)
+    parser.add_argument('--rows', nargs='+', type=int, default=[1000, 10000, 100000])
+    parser.add_argument('--cols', nargs='+', type=int, default=[16])
+    parser.add_argument('--bins', nargs='+', type=int, default=[10])
+    parser.add_argument('--k', type=int, default=3, help='features to select')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write results to this json file')
+    parser.add_argument('--baseline', help='compare against results from this json file')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown')
+    args = parser.parse_args()
+
+    # Torch is optional, skip its engine if missing. Not imported here, since
+    # children inherit the peak RSS of this process
+    cases = args.cases
+    if importlib.util.find_spec('torch') is None:
+        cases = [case for case in cases if case != 'mi_tensor']
+
+    # One result per case, loss (selectors) and dataset shape
+    results = []
+    for case, n_rows, n_cols, n_bins in itertools.product(cases, args.rows, args.cols, args.bins):
+        for loss in (args.losses if case in ('forward', 'backward') else [None]):
+            result = isolated(case, loss, n_rows, n_cols, n_bins, args.k, args.repeat)
+            results.append(result)
+            print(f"{case:<10} {str(loss):<6} rows={n_rows:<8} cols={n_cols:<4} bins={n_bins:<3} "
+                  f"{result['seconds']:9.4f}s {result['rows_per_second']:14.0f} rows/s "
+                  f"{result['peak_rss_mb']:8.1f} MB", flush=True)
+
+    report = {'environment': environment(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+    # Fail on slowdowns wrt the baseline, or on selections changing
+    failures = []
+    if args.baseline:
+        with open(args.baseline) as fh:
+            base = {key(result): result for result in json.load(fh)['results']}
+        for result in results:
+            old = base.get(key(result))
+            if old is None:
+                continue
+            if result['seconds'] > old['seconds'] * (1 + args.tolerance):
+                failures.append(f"{key(result)} took {result['seconds']:.4f}s, baseline {old['seconds']:.4f}s")
+            if result['selected'] != old['selected']:
+                failures.append(f"{key(result)} selected {result['selected']}, baseline {old['selected']}")
+
+    for failure in failures:
+        print('REGRESSION:', failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
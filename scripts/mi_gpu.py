@@ -2,10 +2,13 @@ from context import vfs
 from vfs import mi_frame, mi_tensor
 from vfs.shorthands import df_iris
 from time import perf_counter
+import numpy as np
+import pandas as pd
 
 """
 This script compares our torch MI implementation speed on GPU and CPU, both
-with and without prebinning. 
+with and without prebinning, and the resident-tensor 'torch' engine against
+the original 'legacy' one. GPU runs are skipped if no CUDA device is found.
 """
 
 
@@ -21,35 +24,46 @@ class TimerStdout:
         print('\n\t' + self.readout)
 
 
+def df_synthetic(n_samples=100_000, n_features=8, seed=0):
+    """ Larger dataset, where per-call work rather than overheads dominates """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n_samples, n_features)), columns=[f'F{i}' for i in range(n_features)])
+    df['T'] = df.F0 + df.F1 * df.F2 + rng.normal(scale=.5, size=n_samples)
+    return df, list(df.columns[:-1]), ['T']
+
+
 
 if __name__ == '__main__':
 
-    df, features, targets = df_iris()
+    import torch
+    devices = [False, True] if torch.cuda.is_available() else [False]
+    if not torch.cuda.is_available():
+        print("\nNo CUDA device found: skipping GPU runs.")
 
     # Sometimes GPUs are slow on first contact
     # Lets instance a tensor to have that downtime outside the timed runs
-    import torch
-    torch.Tensor([1]).to('cuda')
-    
-    with TimerStdout():
-        print("\nTENSOR CPU: No prebinning...\n\t", end='')
-        for __ in range(20):
-            print(mi_tensor(df, gpu=False)(features, targets), end='; ')
-
-    with TimerStdout():
-        print("\nTENSOR CPU: W/ prebinning...\n\t", end='')
-        mifun = mi_tensor(df, gpu=False)
-        for __ in range(20):
-            print(mifun(features, targets), end='; ')
-
-
-    with TimerStdout():
-        print("\nTENSOR GPU: No prebinning...\n\t", end='')
-        for __ in range(20):
-            print(mi_tensor(df, gpu=True)(features, targets), end='; ')
-
-    with TimerStdout():
-        print("\nTENSOR GPU: W/ prebinning...\n\t", end='')
-        mifun = mi_tensor(df, gpu=True)
-        for __ in range(20):
-            print(mifun(features, targets), end='; ')
+    if torch.cuda.is_available():
+        torch.Tensor([1]).to('cuda')
+
+    for name, (df, features, targets) in [('IRIS', df_iris()), ('SYNTHETIC', df_synthetic())]:
+        for gpu in devices:
+            device = 'GPU' if gpu else 'CPU'
+
+            for engine in ['legacy', 'torch']:
+                with TimerStdout():
+                    print(f"\n{name} TENSOR {device} ({engine}): No prebinning...\n\t", end='')
+                    for __ in range(20):
+                        print(mi_tensor(df, gpu=gpu, engine=engine)(features, targets), end='; ')
+
+                with TimerStdout():
+                    print(f"\n{name} TENSOR {device} ({engine}): W/ prebinning...\n\t", end='')
+                    mifun = mi_tensor(df, gpu=gpu, engine=engine)
+                    for __ in range(20):
+                        print(mifun(features, targets), end='; ')
+
+        # Reference values & timing of the numpy engine
+        with TimerStdout():
+            print(f"\n{name} FRAME CPU (numpy): W/ prebinning...\n\t", end='')
+            mifun = mi_frame(df)
+            for __ in range(20):
+                print(mifun(features, targets), end='; ')
@@ -29,8 +29,12 @@ if __name__ == '__main__':
     mi_onehot_frame = mi_frame(df_onehot)(features + ['C1'], targets)
     mi_onehot_tensor = mi_tensor(df_onehot, gpu=False)(features + ['C1'], targets)
 
+    # Compute mis for onehot encoded data, collapsed back into a single column
+    mi_collapsed_frame = mi_frame(df_onehot, collapse_onehot=True)(features + ['C1'], targets)
+
     print('One hot encoded MI matches categorical representation, as expected:')
     print('Categorical frame:\t', mi_vanilla_frame)
     print('Categorical tensor:\t', mi_vanilla_tensor)
     print('One-hot frame:\t', mi_onehot_frame)
     print('One-hot tensor:\t', mi_onehot_tensor)
+    print('Collapsed frame:\t', mi_collapsed_frame)
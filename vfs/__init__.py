@@ -1,3 +1,18 @@
 from .losses import *
 from .mi import *
 from .selectors import *
+
+
+def __getattr__(name):
+    """ Lazily exposes 'mi_tensor' and 'mi_knn' at top level too, see vfs.mi.
+    """
+    if name in ('mi_tensor', 'mi_knn'):
+        from . import mi
+        return getattr(mi, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Star-imports skip lazy names unless listed. 'from vfs import *' then loads
+# torch, as it did before 'mi_tensor' was lazy, while 'import vfs' does not.
+# 'mi_knn' is left out, so that star-imports don't require scipy
+__all__ = [name for name in globals() if not name.startswith('_')] + ['mi_tensor']
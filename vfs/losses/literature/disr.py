@@ -6,6 +6,10 @@ class disr:
     def choose(cls, first_iter=False):
         return cls.bivariate_mi if first_iter else cls.disr_score
 
+    @classmethod
+    def choose_batch(cls, first_iter=False):
+        return cls.bivariate_mi_batch if first_iter else cls.disr_score_batch
+
     @staticmethod
     def bivariate_mi(candidate, __, targets, function):
         return function([candidate], targets, h_norm=True)
@@ -13,3 +17,11 @@ class disr:
     @staticmethod
     def disr_score(candidate, selected, targets, function):
         return sum([function([candidate, sf], targets, h_norm=True) for sf in selected])
+
+    @staticmethod
+    def bivariate_mi_batch(candidates, __, targets, function):
+        return function.mi_many([], candidates, targets, h_norm=True)
+
+    @staticmethod
+    def disr_score_batch(candidates, selected, targets, function):
+        return sum([function.mi_many([sf], candidates, targets, h_norm=True) for sf in selected])
@@ -6,6 +6,10 @@ class jmi:
     def choose(cls, first_iter=False):
         return cls.bivariate_mi if first_iter else cls.trivariate_mi
 
+    @classmethod
+    def choose_batch(cls, first_iter=False):
+        return cls.bivariate_mi_batch if first_iter else cls.trivariate_mi_batch
+
     @staticmethod
     def bivariate_mi(candidate, __, targets, function):
         return function([candidate], targets)
@@ -13,3 +17,11 @@ class jmi:
     @staticmethod
     def trivariate_mi(candidate, selected, targets, function):
         return sum([function([candidate, sf], targets) for sf in selected])
+
+    @staticmethod
+    def bivariate_mi_batch(candidates, __, targets, function):
+        return function.mi_many([], candidates, targets)
+
+    @staticmethod
+    def trivariate_mi_batch(candidates, selected, targets, function):
+        return sum([function.mi_many([sf], candidates, targets) for sf in selected])
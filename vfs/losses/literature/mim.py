@@ -2,10 +2,21 @@ class mim:
     """ Mutual Information Maximization, Battiti (1994), forward selection. """
     name = 'MIM loss'
 
+    # Scores never grow along with the selected set, see forward_selector(strategy='lazy')
+    diminishing = True
+
     @classmethod
     def choose(cls, first_iter=False):
         return cls.bivariate_mi
 
+    @classmethod
+    def choose_batch(cls, first_iter=False):
+        return cls.bivariate_mi_batch
+
     @staticmethod
     def bivariate_mi(candidate, __, targets, mi):
         return mi([candidate], targets)
+
+    @staticmethod
+    def bivariate_mi_batch(candidates, __, targets, mi):
+        return mi.mi_many([], candidates, targets)
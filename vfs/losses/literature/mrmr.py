@@ -6,6 +6,10 @@ class mrmr:
     def choose(cls, first_iter=False):
         return cls.bivariate_ixy if first_iter else cls.mrmr_score
 
+    @classmethod
+    def choose_batch(cls, first_iter=False):
+        return cls.bivariate_ixy_batch if first_iter else cls.mrmr_score_batch
+
     @staticmethod
     def mrmr_score(cd, *args):
         return mrmr.bivariate_ixy(cd, *args) - mrmr._bivar_sum_ixw(cd, *args)
@@ -19,3 +23,17 @@ class mrmr:
     def _bivar_sum_ixw(candidate, selected, __, function):
         # Compute summation term sum_w{I(W;Y)} in MRMR loss
         return sum([function([candidate], [sf]) for sf in selected]) / len(selected)
+
+    @staticmethod
+    def mrmr_score_batch(cds, *args):
+        return mrmr.bivariate_ixy_batch(cds, *args) - mrmr._bivar_sum_ixw_batch(cds, *args)
+
+    @staticmethod
+    def bivariate_ixy_batch(candidates, __, targets, function):
+        # Compute independent term I(X;Y) in MRMR loss, for all candidates
+        return function.mi_many([], candidates, targets)
+
+    @staticmethod
+    def _bivar_sum_ixw_batch(candidates, selected, __, function):
+        # Compute summation term sum_w{I(W;Y)} in MRMR loss, for all candidates
+        return sum([function.mi_many([], candidates, [sf]) for sf in selected]) / len(selected)
@@ -1,11 +1,21 @@
+import numpy as np
+
+
 class njmim:
     """ Joint Mutual Information Maximization, Bennasar (2015). """
     name = 'NJMIM loss'
 
+    # Scores never grow along with the selected set, see forward_selector(strategy='lazy')
+    diminishing = True
+
     @classmethod
     def choose(cls, first_iter=False):
         return cls.bivariate_mi if first_iter else cls.njmim_score
 
+    @classmethod
+    def choose_batch(cls, first_iter=False):
+        return cls.bivariate_mi_batch if first_iter else cls.njmim_score_batch
+
     @staticmethod
     def bivariate_mi(candidate, __, targets, function):
         return function([candidate], targets, h_norm=True)
@@ -13,3 +23,11 @@ class njmim:
     @staticmethod
     def njmim_score(candidate, selected, targets, function):
         return min([function([candidate, sf], targets, h_norm=True) for sf in selected])
+
+    @staticmethod
+    def bivariate_mi_batch(candidates, __, targets, function):
+        return function.mi_many([], candidates, targets, h_norm=True)
+
+    @staticmethod
+    def njmim_score_batch(candidates, selected, targets, function):
+        return np.minimum.reduce([function.mi_many([sf], candidates, targets, h_norm=True) for sf in selected])
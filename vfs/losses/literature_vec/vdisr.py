@@ -6,6 +6,10 @@ class vdisr:
     def choose(cls, first_iter=False):
         return cls.bivariate_mi if first_iter else cls.disr_score
 
+    @classmethod
+    def choose_batch(cls, first_iter=False):
+        return cls.bivariate_mi_batch if first_iter else cls.disr_score_batch
+
     @staticmethod
     def bivariate_mi(candidate, __, targets, function):
         return function([candidate], targets, h_norm=True)
@@ -13,3 +17,11 @@ class vdisr:
     @staticmethod
     def disr_score(candidate, selected, targets, function):
         return function([candidate, *selected], targets, h_norm=True)
+
+    @staticmethod
+    def bivariate_mi_batch(candidates, __, targets, function):
+        return function.mi_many([], candidates, targets, h_norm=True)
+
+    @staticmethod
+    def disr_score_batch(candidates, selected, targets, function):
+        return function.mi_many(selected, candidates, targets, h_norm=True)
@@ -9,6 +9,10 @@ class vmrmr1:
     def choose(cls, first_iter=False):
         return cls.bivariate_ixy if first_iter else cls.mrmr_score
 
+    @classmethod
+    def choose_batch(cls, first_iter=False):
+        return cls.bivariate_ixy_batch if first_iter else cls.mrmr_score_batch
+
     @staticmethod
     def mrmr_score(cd, *args):
         return vmrmr1.bivariate_ixy(cd, *args) - vmrmr1._multivariate_ixw(cd, *args)
@@ -22,3 +26,17 @@ class vmrmr1:
     def _multivariate_ixw(candidate, selected, __, function):
         # Compute summation term sum_w{I(W;S)} in MRMR loss
         return function([candidate], selected)
+
+    @staticmethod
+    def mrmr_score_batch(cds, *args):
+        return vmrmr1.bivariate_ixy_batch(cds, *args) - vmrmr1._multivariate_ixw_batch(cds, *args)
+
+    @staticmethod
+    def bivariate_ixy_batch(candidates, __, targets, function):
+        # Compute independent term I(X;Y) in MRMR loss, for all candidates
+        return function.mi_many([], candidates, targets)
+
+    @staticmethod
+    def _multivariate_ixw_batch(candidates, selected, __, function):
+        # Compute summation term sum_w{I(W;S)} in MRMR loss, for all candidates
+        return function.mi_many([], candidates, selected)
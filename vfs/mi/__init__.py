@@ -1,2 +1,22 @@
 from .mi_frame import mi_frame
-from .mi_tensor import mi_tensor
+from .cache import mi_cache
+from .stats import mi_stats
+from .counts import count_table, count_store
+from .mi_matrix import mi_matrix
+from .shared import shared_frame
+
+
+def __getattr__(name):
+    """ Lazy loading of the estimators built on heavy dependencies (PEP 562),
+    so that importing vfs does not import torch or scipy unless 'mi_tensor'
+    or 'mi_knn' are actually used.
+    """
+    if name == 'mi_tensor':
+        from .mi_tensor import mi_tensor
+        globals()['mi_tensor'] = mi_tensor
+        return mi_tensor
+    if name == 'mi_knn':
+        from .mi_knn import mi_knn
+        globals()['mi_knn'] = mi_knn
+        return mi_knn
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,158 @@
+import os
+import pickle
+import threading
+import warnings
+import weakref
+from collections import OrderedDict
+
+
+class mi_cache:
+    """ Bounded LRU memory of already computed mutual informations. Keys are
+    order-insensitive: I(X;Y) is stored under the frozensets of both X and Y
+    plus the 'h_norm' flag, so I([a, b]; [y]) and I([y]; [b, a]) share a slot.
+
+    # Example
+    mi_fun = mi_frame(df, cache=mi_cache(maxsize=10000, path='mi.pkl'))
+    ...
+    mi_fun.cache.save()
+    """
+    def __init__(self, maxsize=2**16, path=None):
+        """ Starts an empty cache, or loads the one stored at 'path' if any.
+        """
+        self.maxsize = maxsize
+        self.path = path
+        self.tag = None
+        self.owner = None
+        self.hits = 0
+        self.misses = 0
+        self.store = OrderedDict()
+        self.lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            self.load(path)
+
+
+    @classmethod
+    def resolve(cls, cache):
+        """ Cache of an MI function out of its 'cache' arg: an 'mi_cache' as
+        is, the max number of stored values of a new one, True for a default
+        one, or None (or False) for none.
+        """
+        if isinstance(cache, bool):
+            return cls() if cache else None
+        return cls(cache) if isinstance(cache, int) else cache
+
+
+    @staticmethod
+    def key(feat_x: list, feat_y: list, h_norm=False):
+        """ Canonical, order-insensitive key of a single MI query.
+        """
+        return frozenset([frozenset(feat_x), frozenset(feat_y)]), h_norm
+
+
+    def get(self, key):
+        """ Returns the cached value for 'key', or None if missing.
+        """
+        with self.lock:
+            if key in self.store:
+                self.store.move_to_end(key)
+                self.hits += 1
+                return self.store[key]
+            self.misses += 1
+            return None
+
+
+    def put(self, key, value):
+        """ Stores 'value', evicting the least recently used entry if full.
+        """
+        with self.lock:
+            self.store[key] = value
+            self.store.move_to_end(key)
+            while len(self.store) > self.maxsize:
+                self.store.popitem(last=False)
+
+
+    def bind(self, tag, owner=None):
+        """ Attaches the cache to the dataset identified by 'tag', that of the
+        MI function 'owner'. Values computed on any other dataset are dropped.
+        Keys only hold column names, so live MI functions on different data
+        can not share a cache.
+        """
+        bound = self.owner() if self.owner is not None else None
+        assert bound is None or bound is owner or self.tag == tag, \
+            "MI cache: already bound to an MI function on another dataset, give each its own cache."
+
+        if self.tag is not None and self.tag != tag and self.store:
+            warnings.warn("MI cache belongs to a different dataset: clearing it.")
+            self.clear()
+        self.tag = tag
+        self.owner = weakref.ref(owner) if owner is not None else None
+
+
+    def clear(self):
+        with self.lock:
+            self.store.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+    def info(self) -> dict:
+        """ Hit/miss counters and current size, as in functools.lru_cache.
+        """
+        return {'hits': self.hits, 'misses': self.misses,
+                'maxsize': self.maxsize, 'currsize': len(self.store)}
+
+
+    def save(self, path=None):
+        """ Persists the cache to disk, at 'path' or the one given on init.
+        """
+        path = path or self.path
+        assert path, "Saving MI cache: no path provided."
+        with self.lock:
+            payload = {'tag': self.tag, 'store': list(self.store.items())}
+        with open(path, 'wb') as fh:
+            pickle.dump(payload, fh)
+
+
+    def load(self, path=None):
+        """ Restores a cache persisted with 'save', keeping at most 'maxsize'
+        of its most recently used entries.
+        """
+        path = path or self.path
+        with open(path, 'rb') as fh:
+            payload = pickle.load(fh)
+        with self.lock:
+            self.tag = payload['tag']
+            self.store = OrderedDict(payload['store'][-self.maxsize:])
+
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock']
+        state['owner'] = None
+        return state
+
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+
+def cache_enable(method):
+    """ Decorator for the __call__ method inside mi_function to memoize MI
+    values in the instance's 'cache' attribute, if the instance has one.
+    """
+    def wrapper(instance, feat_x, feat_y, h_norm=False):
+
+        # Fall through if caching was not requested
+        if instance.cache is None:
+            return method(instance, feat_x, feat_y, h_norm=h_norm)
+
+        # Look the value up, compute & store it only if missing
+        key = instance.cache.key(feat_x, feat_y, h_norm)
+        value = instance.cache.get(key)
+        if value is None:
+            value = method(instance, feat_x, feat_y, h_norm=h_norm)
+            instance.cache.put(key, value)
+        return value
+    return wrapper
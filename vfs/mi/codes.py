@@ -0,0 +1,153 @@
+import numpy as np
+
+
+# Mixed-radix codes are re-densified before they can overflow int64
+MAX_CARDINALITY = 2 ** 62
+
+# Joint tables up to this many cells per sample are counted with np.bincount,
+# sparser ones fall back to a sorted np.unique pass
+BINCOUNT_DENSITY = 4
+
+
+def uint_dtype(n_values: int):
+    """ Smallest unsigned integer dtype able to hold 'n_values' distinct codes.
+    """
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if n_values <= np.iinfo(dtype).max + 1:
+            return dtype
+    return np.uint64
+
+
+def append_rows(buffer, rows: np.ndarray, new: np.ndarray):
+    """ 'rows' followed by 'new', as a view over the leading axis of 'buffer',
+    written right after them if 'rows' already is such a view, so appending
+    costs the new rows only. Out of room, rows are moved to the front of the
+    buffer, or of a new one of twice their size if it is over half full.
+    Returns the buffer and the view.
+    """
+    n_rows = len(rows) + len(new)
+    owned = buffer is not None and rows.base is buffer
+    start = (rows.ctypes.data - buffer.ctypes.data) // buffer.strides[0] if owned else 0
+    if not owned or start + n_rows > len(buffer):
+        if not owned or 2 * n_rows > len(buffer):
+            buffer = np.empty((2 * n_rows, *rows.shape[1:]), dtype=rows.dtype, order='F')
+        buffer[:len(rows)] = rows
+        start = 0
+    buffer[start + len(rows):start + n_rows] = new
+    return buffer, buffer[start:start + n_rows]
+
+
+def densify(code: np.ndarray, card: int, force=False):
+    """ Relabels an integer code onto the contiguous range [0, n_unique), so its
+    cardinality is bounded by the number of samples instead of the radices.
+    Does nothing if the code is already that compact, unless 'force'.
+    """
+    if card <= len(code) and not force:
+        return code, card
+    uniques, code = np.unique(code, return_inverse=True)
+    return code.reshape(-1), len(uniques)
+
+
+def mix(code: np.ndarray, card: int, column: np.ndarray, radix: int):
+    """ Appends a single column to a mixed-radix joint code of cardinality
+    'card'. Returns the new code and its cardinality 'card * radix'.
+    """
+    if card * radix > MAX_CARDINALITY:
+        code, card = densify(code, card, force=True)
+    return code * radix + column, card * radix
+
+
+def joint_code(columns: list, radices: list, n_samples: int, code=None, card=1):
+    """ Mixes several integer columns into a single dense int64 code, one per
+    sample. The empty set of columns yields the constant code 0. If given a
+    base 'code' of cardinality 'card', the columns are mixed on top of it.
+    """
+    if code is None:
+        code = np.zeros(n_samples, dtype=np.int64)
+    for column, radix in zip(columns, radices):
+        code, card = mix(code, card, column, radix)
+    return densify(code, card)
+
+
+def mutual_counts(cx: np.ndarray, nx: int, cy: np.ndarray, ny: int):
+    """ Counts the samples falling into each occupied (x, y) cell, along with
+    the marginal counts of that cell's x and y. Both codes must be dense, so
+    that 'nx * ny' stays within int64.
+    """
+    joint = cx * ny + cy
+    if nx * ny <= BINCOUNT_DENSITY * len(joint):
+        counts = np.bincount(joint, minlength=nx * ny)
+        cells = np.flatnonzero(counts)
+        cxy = counts[cells]
+    else:
+        cells, cxy = np.unique(joint, return_counts=True)
+
+    cx = np.bincount(cx, minlength=nx)[cells // ny]
+    cy = np.bincount(cy, minlength=ny)[cells % ny]
+    return cxy, cx, cy
+
+
+def group_rows(cells: np.ndarray, radix: int):
+    """ Groups equal rows of a matrix of bin codes with values below 'radix'.
+    Returns the dense group id of each row and the index of each group's first
+    row. Rows are mixed into int64 keys when they fit, else compared as bytes.
+    """
+    n, m = cells.shape
+    if m == 0:
+        return np.zeros(n, dtype=np.intp), np.arange(min(n, 1))
+    if radix ** m <= MAX_CARDINALITY:
+        keys = cells.astype(np.int64) @ (radix ** np.arange(m - 1, -1, -1, dtype=np.int64))
+    else:
+        cells = np.ascontiguousarray(cells)
+        keys = cells.view(np.dtype((np.void, cells.itemsize * m))).reshape(-1)
+    __, first, ids = np.unique(keys, return_index=True, return_inverse=True)
+    return ids.reshape(-1), first
+
+
+def count_rows(cells: np.ndarray, radix: int, counts=None):
+    """ Unique rows of a matrix of bin codes and how many times each occurs.
+    If 'counts' are given, rows are weighted by them (ie. merges tables), and
+    the result keeps their dtype (eg. float, for decayed counts).
+    """
+    dtype = np.int64 if counts is None else counts.dtype
+    ids, first = group_rows(cells, radix)
+    counts = np.bincount(ids, weights=counts, minlength=len(first))
+    return cells[first], counts.astype(dtype)
+
+
+def table_information(cells: np.ndarray, counts: np.ndarray, n_x: int, radix: int):
+    """ Same as 'information', from a joint count table of X and Y instead of
+    codes: each unique row of 'cells' holds the bins of X (first 'n_x'
+    columns) and Y (the rest), and 'counts' how many samples fall in it.
+    """
+    ix, __ = group_rows(cells[:, :n_x], radix)
+    iy, __ = group_rows(cells[:, n_x:], radix)
+    cx = np.bincount(ix, weights=counts)[ix]
+    cy = np.bincount(iy, weights=counts)[iy]
+    return plugin(counts, cx, cy, counts.sum())
+
+
+def information(cx: np.ndarray, nx: int, cy: np.ndarray, ny: int, n_samples: int):
+    """ Plug-in estimates of the mutual information I(X;Y) and joint entropy
+    H(X,Y) from the dense codes of X and Y. Also returns the joint pmf.
+    """
+    return plugin(*mutual_counts(cx, nx, cy, ny), n_samples)
+
+
+def plugin(cxy: np.ndarray, cx: np.ndarray, cy: np.ndarray, n_samples: int):
+    """ I(X;Y), H(X,Y) and joint pmf from the counts of each occupied (x, y)
+    cell and the marginal counts of its x and y, as 'mutual_counts' returns.
+    """
+    pxy, px, py = cxy / n_samples, cx / n_samples, cy / n_samples
+    return np.sum(pxy * np.log(pxy / px / py)), -np.sum(pxy * np.log(pxy)), pxy
+
+
+class encoded_set(list):
+    """ List of feature names that also carries their dense joint code, so it
+    can be grown one feature at a time without re-mixing all of its columns.
+    Behaves as a plain list everywhere else.
+    """
+    def __init__(self, feats=(), code=None, card=1):
+        super().__init__(feats)
+        self.code = code
+        self.card = card
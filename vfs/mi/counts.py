@@ -0,0 +1,200 @@
+import json
+from collections import OrderedDict
+import numpy as np
+from .codes import uint_dtype, count_rows, table_information
+
+
+# Tables with up to this many cells are stored densely, sparsely otherwise
+DENSE_CELLS = 2 ** 16
+
+# Float counts below this are rounding residue of subtracting rows, ie. zero
+RESIDUE = 1e-9
+
+
+def _settle(counts: np.ndarray) -> np.ndarray:
+    """ Zeroes the residue left in float (eg. decayed) counts by subtractions.
+    """
+    if counts.dtype.kind == 'f':
+        counts[np.abs(counts) < RESIDUE] = 0
+    return counts
+
+
+class count_table:
+    """ Joint counts of the bins of some columns, the sufficient statistic of
+    any MI among them. Small tables are stored densely, as a flat vector over
+    all 'n_bins ** len(cols)' cells, larger ones sparsely, as the occupied
+    cells (rows of bin codes) and their counts. Tables over the same columns
+    built on disjoint shards of data merge by addition, so MIs of the whole
+    dataset can be computed from per-shard tables without moving raw data.
+    Likewise, rows leaving a dataset are subtracted and counts can be scaled.
+
+    # Example
+    table = sum(shard.counts(['F1', 'F2', 'F5']) for shard in mi_frames)
+    mi, h, pxy = table.information(['F1', 'F2'], ['F5'])
+    """
+    def __init__(self, cols: list, n_bins: int, counts: np.ndarray, cells=None):
+        """ Wraps already counted cells, see 'from_codes' to count samples.
+        """
+        assert len(cols) > 0, "Count table: needs at least one column."
+        self.cols = list(cols)
+        self.n_bins = n_bins
+        self.counts = counts
+        self.cells = cells
+        self.index = {col: ii for ii, col in enumerate(self.cols)}
+
+
+    @classmethod
+    def from_codes(cls, cols: list, codes: np.ndarray, n_bins: int, weights=None):
+        """ Counts the rows of 'codes', a matrix of bin codes of 'cols'. Rows
+        add up their 'weights' instead, if given.
+        """
+        if n_bins ** len(cols) > DENSE_CELLS:
+            cells, counts = count_rows(codes, n_bins, weights)
+            return cls(cols, n_bins, counts, cells)
+
+        keys = codes.astype(np.int64) @ (n_bins ** np.arange(len(cols) - 1, -1, -1, dtype=np.int64))
+        counts = np.bincount(keys, weights=weights, minlength=n_bins ** len(cols))
+        return cls(cols, n_bins, counts)
+
+
+    @property
+    def dense(self) -> bool:
+        return self.cells is None
+
+
+    @property
+    def n_samples(self):
+        return self.counts.sum()
+
+
+    def sparse(self):
+        """ Occupied cells and their counts, whatever the storage.
+        """
+        if not self.dense:
+            return self.cells, self.counts
+        occupied = np.flatnonzero(self.counts)
+        cells = np.unravel_index(occupied, (self.n_bins,) * len(self.cols))
+        return np.stack(cells, axis=1).astype(uint_dtype(self.n_bins)), self.counts[occupied]
+
+
+    def __add__(self, other):
+        """ Merges the counts of two tables over the same columns.
+        """
+        assert self.cols == other.cols and self.n_bins == other.n_bins, \
+            f"Count table: can't merge tables over {self.cols} and {other.cols}."
+        if self.dense:
+            return count_table(self.cols, self.n_bins, _settle(self.counts + other.counts))
+        cells, counts = count_rows(np.vstack([self.cells, other.cells]), self.n_bins,
+                                   np.concatenate([self.counts, other.counts]))
+        occupied = _settle(counts) != 0
+        return count_table(self.cols, self.n_bins, counts[occupied], cells[occupied])
+
+
+    def __sub__(self, other):
+        """ Removes the counts of 'other', a table of rows counted by this one.
+        """
+        return self + other * -1
+
+
+    def __mul__(self, factor):
+        """ Scales all counts, eg. to decay them.
+        """
+        return count_table(self.cols, self.n_bins, self.counts * factor, self.cells)
+
+
+    def __radd__(self, other):
+        # Allows the builtin sum() over tables, which starts at 0
+        return self if other == 0 else self.__add__(other)
+
+
+    def covers(self, cols: list) -> bool:
+        return all(col in self.index for col in cols)
+
+
+    def information(self, feat_x: list, feat_y: list):
+        """ I(X;Y), H(X,Y) and joint pmf of any X and Y among the table columns,
+        summing out the rest. Same values as 'mi_frame' on the whole data.
+        """
+        cells, counts = self.sparse()
+        idx = [self.index[ff] for ff in [*feat_x, *feat_y]]
+        cells, counts = count_rows(cells[:, idx], self.n_bins, counts)
+        return table_information(cells, counts, len(feat_x), self.n_bins)
+
+
+    def save(self, path: str):
+        """ Stores the table as a compressed '.npz' file, raw data free.
+        """
+        arrays = {'counts': self.counts} if self.dense else {'counts': self.counts, 'cells': self.cells}
+        header = json.dumps({'cols': self.cols, 'n_bins': self.n_bins})
+        np.savez_compressed(path, header=np.array(header), **arrays)
+
+
+    @classmethod
+    def load(cls, path: str):
+        """ Restores a table stored with 'save'.
+        """
+        with np.load(path) as npz:
+            header = json.loads(str(npz['header']))
+            cells = npz['cells'] if 'cells' in npz else None
+            return cls(header['cols'], header['n_bins'], npz['counts'], cells)
+
+
+class count_store:
+    """ MI function answering queries out of count tables instead of raw data,
+    to be used as 'mi_fun' by the selectors. The table of each query is taken
+    from stored 'tables' covering its features, else requested from every one
+    of 'sources' and merged. Sources are callables returning the count table
+    of some columns on one shard of data, eg. the 'counts' method of several
+    'mi_frame', or stubs to remote nodes holding them, in which case only the
+    small count tables travel. Sources are queried concurrently on 'executor'
+    if given (eg. a thread pool, for remote sources).
+
+    # Example
+    mi_fun = count_store(sources=[mi_frame(shard).counts for shard in shards])
+    forward_selector(None, features, targets, k=3, loss=jmim, mi_fun=mi_fun)
+    """
+    def __init__(self, sources=(), tables=(), n_digits=3, executor=None, maxsize=2**10):
+        self.sources = list(sources)
+        self.n_digits = n_digits
+        self.executor = executor
+        self.maxsize = maxsize
+        self.tables = OrderedDict()
+        for table in tables:
+            self.add(table)
+
+
+    def add(self, table: count_table):
+        """ Stores a table, merging it into a stored one over the same columns.
+        """
+        key = tuple(table.cols)
+        self.tables[key] = self.tables[key] + table if key in self.tables else table
+        self.tables.move_to_end(key)
+        while len(self.tables) > self.maxsize:
+            self.tables.popitem(last=False)
+
+
+    def table(self, cols: list) -> count_table:
+        """ Count table covering 'cols', stored or merged from all the sources.
+        """
+        for table in reversed(self.tables.values()):
+            if table.covers(cols):
+                return table
+
+        assert self.sources, f"Count store: no table covers {cols} and there are no sources."
+        mapper = self.executor.map if self.executor is not None else map
+        self.add(sum(mapper(lambda source : source(cols), self.sources)))
+        return next(reversed(self.tables.values()))
+
+
+    def __call__(self, feat_x: list, feat_y: list, h_norm=False) -> float:
+        """ Computes I(X;Y) from counts, rounded as 'mi_frame' does. If 'h_norm'
+        returns I(X;Y)/H(*X,*Y) instead.
+        """
+        assert isinstance(feat_x, list), f"Computing MI: Provided 'feat_x' not list: {feat_x}."
+        assert isinstance(feat_y, list), f"Computing MI: Provided 'feat_y' not list: {feat_y}."
+        assert isinstance(h_norm, bool), f"Computing MI: Provided 'h_norm' not bool: {h_norm}."
+
+        mi, h, pxy = self.table(list(dict.fromkeys([*feat_x, *feat_y]))).information(feat_x, feat_y)
+        mi /= h if h_norm else 1
+        assert mi >= 0, f'Mutual information yields negative value: {mi}'
+        return mi.round(self.n_digits)
@@ -1,6 +1,16 @@
+import os
+import copy
+import hashlib
+import tempfile
+import weakref
+from time import perf_counter
 import numpy as np
 import pandas as pd
-from .onehot import onehot_enable
+from .onehot import onehot_enable, onehot_children, onehot_index
+from .cache import mi_cache, cache_enable
+from .stats import stats_enable
+from .codes import uint_dtype, joint_code, information, encoded_set, append_rows
+from .counts import count_table
 
 
 class mi_frame:
@@ -14,20 +24,93 @@ class mi_frame:
 
     # Example 2
     mi_val = mi_helper(df, n_bins, n_digits)(features, targets)
+
+    Data is binned into a compact unsigned integer matrix, on which two
+    estimation engines can run. The default 'numpy' engine counts mixed-radix
+    integer codes, whereas 'pandas' runs the original groupby-based estimator.
+
+    Repeated MI queries can be memoized by passing 'cache', either as the max
+    number of stored values, True for the default size, or as an 'mi_cache'
+    instance (eg. persisted).
+
+    Datasets larger than memory can be streamed in with 'from_chunks',
+    'from_csv' or 'from_parquet', keeping their codes in a file on disk.
+
+    Columns are split into 'n_bins' of equal width by default. The 'binning'
+    arg, either a mode for all columns or a dict of modes per column, can ask
+    for other ones:
+        > 'uniform':     equal-width bins, as pd.cut does.
+        > 'quantile':    equal-frequency bins, at evenly spaced quantiles.
+        > 'integer':     one bin per distinct value, for discrete numbers.
+        > 'categorical': one bin per category, for labels of any type.
+
+    Bin 'edges' of another frame, along with its 'binning', can be reused (eg.
+    by training and new data, or by frames on different shards of a dataset,
+    so that their 'counts' can be merged). Values out of their range fall in
+    the first or last bin. Discrete columns keep one more bin, always empty
+    when fitted, where values never seen then fall (eg. new categories).
+
+    Onehot encoded children (eg. 'A1#a', 'A1#b') are found by their parent
+    name ('A1') in an index built once. With 'collapse_onehot', each group of
+    them is binned instead as a single categorical column named after their
+    parent, which yields the same MIs out of far fewer columns. Sparse children
+    are then read by their nonzero entries only, otherwise a block of columns
+    at a time. The implicit entries of sparse columns (eg. of
+    pd.DataFrame.sparse.from_spmatrix, filled with NaN) are taken as zeros.
+
+    Calls, rows processed, joint table cells, cache hits and the time spent on
+    prebinning and MIs are collected into 'stats', an 'mi_stats', if given.
+
+    New rows can be appended with 'update', optionally over a sliding window
+    or decaying old rows. Count tables of the features queried over and over
+    can be kept up to date along, see 'track'.
     """
-    def __init__(self, df: pd.DataFrame, n_bins=10, n_digits=3):
+    engines = ('numpy', 'pandas')
+    binnings = ('uniform', 'quantile', 'integer', 'categorical')
+
+    def __init__(self, df: pd.DataFrame, n_bins=10, n_digits=3, engine='numpy', cache=None, edges=None,
+                 binning='uniform', collapse_onehot=False, stats=None):
         """ Loads base arguments and prebins data for later use.
         """
+        assert engine in self.engines, f"Unknown MI engine '{engine}', choose from {self.engines}."
+
         # Base hyper params
         self.n_bins = n_bins
         self.n_digits = n_digits
+        self.engine = engine
 
-        # Infer some basics and prebin the data
-        self.cols = df.columns.to_list()
+        # Infer some basics and prebin the data into an integer code matrix
+        tic = perf_counter()
+        edges = self.setup_columns(df.columns, binning, edges, collapse_onehot)
+        df = self.collapse(df)
         self.n_samples = len(df)
-        self.binned = self.sample_prebinning(df)
+        self.codes, self.edges = self.sample_prebinning(df, edges)
+        self.radices = [self.radix(col) for col in self.cols]
+        self.index = {col: ii for ii, col in enumerate(self.cols)}
 
+        # Optional instrumentation
+        self.stats = stats
+        if stats is not None:
+            stats.add_time('mi.prebinning', perf_counter() - tic)
 
+        # Path of the memory-mapped codes, when published by 'shared_frame'
+        self.shared = None
+
+        # Rows per pass when accumulating counts, for frames streamed from disk
+        self.chunk_rows = None
+
+        # Row weights once decayed by 'update', and incrementally updated tables
+        self.weights = None
+        self.tracked = []
+
+        # Optional memoization, tied to this very dataset and settings
+        self.cache = mi_cache.resolve(cache)
+        if self.cache is not None:
+            self.cache.bind(self.fingerprint(), self)
+
+
+    @stats_enable
+    @cache_enable
     @onehot_enable
     def __call__(self, feat_x: list, feat_y: list, h_norm=False) -> float:
         """ Base instance operation. Checks healthy inputs and then runs MI.
@@ -44,29 +127,625 @@ class mi_frame:
         assert .97 < pxy.sum() < 1.03, f'Probability space not covered: pxy.sum() = {pxy.sum()}.'
         assert mi >= 0, f'Mutual information yields negative value: {mi}'
 
+        # Work done, if instrumented
+        if self.stats is not None:
+            self.stats.count('mi.rows', self.n_samples)
+            self.stats.count('mi.cells', len(pxy))
+
         # Return solely mutual information
         return mi
 
 
-    def sample_prebinning(self, df):
-        """ Discretize each feature and put each sample into a bin.
+    @classmethod
+    def from_chunks(cls, chunks, n_bins=10, n_digits=3, cache=None, path=None, chunk_rows=2**20, edges=None,
+                    binning='uniform', sample_rows=2**20, seed=0, collapse_onehot=False, stats=None):
+        """ Builds a frame out of a dataset too large for memory, given as a
+        sequence of dataframe 'chunks' with the same columns. Since they are
+        scanned twice, first for the bin edges and then to bin them, 'chunks'
+        must be re-iterable (eg. a list) or a callable returning a new iterator
+        of them on each call. Codes are written to a memory-mapped file at
+        'path', or to a temporary one removed along with the frame.
+
+        Quantile edges are estimated out of a uniform sample of 'sample_rows'
+        rows, drawn with 'seed', all other ones are exact.
+
+        MIs are then computed by accumulating the joint counts of X and Y over
+        blocks of 'chunk_rows' rows, so memory is bounded by the block plus
+        count table sizes, not by the number of rows. Uses the numpy engine.
+
+        # Example
+        mi_fun = mi_frame.from_chunks(lambda : pd.read_csv(path, chunksize=10**6))
+        """
+        scan = chunks if callable(chunks) else lambda : iter(chunks)
+        assert callable(chunks) or iter(chunks) is not chunks, \
+            "Streaming MI frame: 'chunks' is scanned twice, pass a re-iterable or a callable."
+
+        # Same attributes as __init__, set along the way
+        tic = perf_counter()
+        self = cls.__new__(cls)
+        self.n_bins, self.n_digits, self.engine = n_bins, n_digits, 'numpy'
+        self.cols, self.n_samples = None, 0
+
+        # First pass: columns, number of rows and what each binning needs
+        rng = np.random.default_rng(seed)
+        for chunk in scan():
+            if self.cols is None:
+                edges = self.setup_columns(chunk.columns, binning, edges, collapse_onehot)
+                fit = {mode: [col for col in self.cols if col not in edges and self.binning[col] == mode]
+                       for mode in self.binnings}
+                mn, mx, sample, keys, uniques = None, None, None, np.empty(0), {}
+            chunk = self.collapse(chunk)
+            assert chunk.columns.to_list() == self.cols, "Streaming MI frame: chunks differ in their columns."
+            if not len(chunk):
+                continue
+
+            # Global extremes of equal-width columns
+            values = self.column_values(chunk, fit['uniform'])
+            mn = values.min(axis=0) if mn is None else np.minimum(mn, values.min(axis=0))
+            mx = values.max(axis=0) if mx is None else np.maximum(mx, values.max(axis=0))
+
+            # Rows with the smallest random keys so far, a uniform sample of all
+            if fit['quantile']:
+                values = self.column_values(chunk, fit['quantile'])
+                keys = np.concatenate([keys, rng.random(len(values))])
+                sample = values if sample is None else np.vstack([sample, values])
+                kept = np.argsort(keys, kind='stable')[:sample_rows]
+                keys, sample = keys[kept], sample[kept]
+
+            # Distinct values of discrete columns
+            for col in fit['integer'] + fit['categorical']:
+                values = self.column_values(chunk, [col])[:, 0]
+                uniques[col] = np.union1d(uniques.get(col, values[:0]), values)
+            self.n_samples += len(chunk)
+        assert self.n_samples > 0, "Streaming MI frame: no rows to prebin."
+
+        # Edges of all columns, given or out of the first pass
+        edges.update({col: block for col, block in zip(fit['uniform'], cls.bin_edges(mn, mx, n_bins).T)})
+        if fit['quantile']:
+            fitted = np.quantile(sample, np.linspace(0, 1, n_bins + 1), axis=0)
+            edges.update({col: cls.unique_edges(block) for col, block in zip(fit['quantile'], fitted.T)})
+        for col in fit['integer'] + fit['categorical']:
+            edges[col] = self.fit_edges(uniques[col], self.binning[col])
+        self.edges = {col: np.asarray(edges[col]) for col in self.cols}
+        self.radices = [self.radix(col) for col in self.cols]
+
+        # Codes live on disk, temporary ones only as long as the frame does
+        temporary = path is None
+        if temporary:
+            fd, path = tempfile.mkstemp(prefix='vfs-', suffix='.codes')
+            os.close(fd)
+
+        # Second pass: bin every chunk with the global edges, straight to disk
+        shape, dtype = (self.n_samples, len(self.cols)), uint_dtype(max(self.radices))
+        codes = np.memmap(path, dtype=dtype, mode='w+', shape=shape, order='F')
+        start = 0
+        for chunk in scan():
+            codes[start:start + len(chunk)] = self.bin_rows(self.collapse(chunk))
+            start += len(chunk)
+        assert start == self.n_samples, "Streaming MI frame: chunks changed between passes."
+        codes.flush()
+        del codes
+
+        # Codes read-only mapped from the file
+        self.codes = np.memmap(path, dtype=dtype, mode='r', shape=shape, order='F')
+        self.index = {col: ii for ii, col in enumerate(self.cols)}
+        self.shared = path
+        self.chunk_rows = chunk_rows
+        self.weights = None
+        self.tracked = []
+        if temporary:
+            weakref.finalize(self, os.remove, path)
+
+        self.stats = stats
+        if stats is not None:
+            stats.add_time('mi.prebinning', perf_counter() - tic)
+
+        self.cache = mi_cache.resolve(cache)
+        if self.cache is not None:
+            self.cache.bind(self.fingerprint(), self)
+        return self
+
+
+    @classmethod
+    def from_csv(cls, path: str, chunksize=2**20, usecols=None, **kwargs):
+        """ Streams a csv file into a frame, reading 'chunksize' rows at a time.
+        Other 'kwargs' are passed to 'from_chunks'.
+        """
+        chunks = lambda : pd.read_csv(path, chunksize=chunksize, usecols=usecols)
+        return cls.from_chunks(chunks, **kwargs)
+
+
+    @classmethod
+    def from_parquet(cls, path: str, batch_size=2**20, columns=None, **kwargs):
+        """ Streams a parquet file into a frame, reading 'batch_size' rows at a
+        time (requires pyarrow). Other 'kwargs' are passed to 'from_chunks'.
+        """
+        import pyarrow.parquet as pq
+        chunks = lambda : (batch.to_pandas() for batch in
+                           pq.ParquetFile(path).iter_batches(batch_size, columns=columns))
+        return cls.from_chunks(chunks, **kwargs)
+
+
+    @property
+    def streaming(self) -> bool:
+        """ Whether MIs are accumulated over blocks of rows, not whole columns.
+        """
+        return getattr(self, 'chunk_rows', None) is not None
+
+
+    @property
+    def tabled(self) -> bool:
+        """ Whether MIs must be computed out of count tables rather than codes,
+        ie. when streaming or with decayed rows weighing less than others.
+        """
+        return self.streaming or getattr(self, 'weights', None) is not None
+
+
+    def update(self, new_rows: pd.DataFrame, window=None, decay=None):
+        """ Appends 'new_rows' to the data, binned with the frozen edges of the
+        frame (values out of their range fall in the outer bins). Afterwards,
+        only the latest 'window' rows are kept, if given. With 'decay', every
+        update first multiplies the weight of all previous rows by it, so old
+        rows fade out exponentially. Tables followed with 'track' are updated
+        by counting just the added and removed rows. Codes are appended in
+        place, into a buffer with room to spare, so an update without decay
+        costs its rows, not the whole data. Returns self.
+
+        # Example
+        mi_fun = mi_frame(df_history).track(features + targets)
+        mi_fun.update(df_last_hour, decay=0.9)
+        """
+        assert self.shared is None, "Updating MI frame: can't update frames backed by a file."
+        assert decay is None or 0 < decay <= 1, f"Updating MI frame: decay not in (0, 1]: {decay}."
+        new = self.bin_rows(self.collapse(new_rows)[self.cols]).astype(self.codes.dtype)
+
+        # Fade out previous rows, counting them as weights from now on
+        if decay is not None:
+            self.weights = np.ones(self.n_samples) if self.weights is None else self.weights
+            self.weights *= decay
+            self.tracked = [table * decay for table in self.tracked]
+        new_weights = None if self.weights is None else np.ones(len(new))
+
+        # New rows appended after the current ones. Those falling out of the window, the oldest ones
+        self.buffer, codes = append_rows(getattr(self, 'buffer', None), self.codes, new)
+        weights = None
+        if self.weights is not None:
+            self.weights_buffer, weights = append_rows(getattr(self, 'weights_buffer', None), self.weights,
+                                                       new_weights)
+        drop = max(0, len(codes) - window) if window is not None else 0
+
+        # Tracked tables only count the rows added and removed
+        for ii, table in enumerate(self.tracked):
+            idx = [self.index[ff] for ff in table.cols]
+            table = table + count_table.from_codes(table.cols, new[:, idx], table.n_bins, new_weights)
+            if drop:
+                table = table - count_table.from_codes(table.cols, codes[:drop, idx], table.n_bins,
+                                                       None if weights is None else weights[:drop])
+            self.tracked[ii] = table
+
+        self.codes = codes[drop:]
+        self.weights = None if weights is None else weights[drop:]
+        self.n_samples = len(self.codes)
+
+        # Memoized values are outdated. Chain the dataset tag to the new rows
+        if self.cache is not None:
+            digest = hashlib.sha1(repr((self.cache.tag, drop, decay)).encode())
+            digest.update(np.ascontiguousarray(new))
+            self.cache.clear()
+            self.cache.bind(digest.hexdigest(), self)
+        return self
+
+
+    def subsample(self, n_rows, seed=0):
+        """ Frame over a uniform sample of 'n_rows' rows (a fraction of them if
+        a float below 1), drawn with 'seed'. Rows are taken from the codes with
+        the same bins, not binned again, so its MIs are cheap estimates of the
+        ones of this frame.
+        """
+        n_rows = int(n_rows * self.n_samples) if isinstance(n_rows, float) and n_rows < 1 else int(n_rows)
+        n_rows = max(1, min(n_rows, self.n_samples))
+        rows = np.sort(np.random.default_rng(seed).choice(self.n_samples, n_rows, replace=False))
+
+        sample = copy.copy(self)
+        sample.codes = np.asfortranarray(self.codes[rows])
+        sample.n_samples = n_rows
+        sample.weights = None if self.weights is None else self.weights[rows]
+        sample.shared, sample.chunk_rows, sample.tracked, sample.cache = None, None, [], None
+        return sample
+
+
+    def track(self, cols: list):
+        """ Keeps the count table of 'cols' up to date on every 'update'. MIs
+        among tracked columns are then computed out of their table, at a cost
+        which depends on the number of occupied cells, not of rows. Other MIs
+        are still computed out of the codes. Returns self.
+        """
+        self.tracked.append(self.counts(list(dict.fromkeys(onehot_children(self.cols, cols, self.onehot)))))
+        return self
+
+
+    def covering(self, cols: list):
+        """ Tracked count table holding all of 'cols', if any, else None.
+        """
+        return next((table for table in self.tracked if table.covers(cols)), None)
+
+
+    def __getstate__(self):
+        """ Pickles shared frames without their data, only the path to it, and
+        others without the spare room of their buffers.
+        """
+        state = self.__dict__.copy()
+        state.pop('buffer', None)
+        state.pop('weights_buffer', None)
+        if self.shared is not None:
+            state['codes'] = (self.codes.dtype.str, self.codes.shape)
+        return state
+
+
+    def __setstate__(self, state):
+        """ Maps the data of shared frames back from their file, zero-copy.
+        """
+        self.__dict__.update(state)
+        if self.shared is not None:
+            dtype, shape = state['codes']
+            self.codes = np.memmap(self.shared, dtype=dtype, mode='r', shape=shape, order='F')
+
+
+    def fingerprint(self) -> str:
+        """ Digest of the binned data and settings, identifying which dataset
+        a persisted cache was computed on.
+        """
+        digest = hashlib.sha1(repr((self.cols, self.n_bins, self.n_digits)).encode())
+        for jj in range(len(self.cols)):
+            digest.update(np.ascontiguousarray(self.codes[:, jj]))
+        return digest.hexdigest()
+
+
+    @property
+    def binned(self) -> pd.DataFrame:
+        """ Binned data as a dataframe, a view over the integer code matrix.
+        """
+        return pd.DataFrame(self.codes, columns=self.cols, copy=False)
+
+
+    def sample_prebinning(self, df, edges=None, block_size=2**23):
+        """ Discretize each feature and put each sample into a bin. Bin indices
+        are written straight into a preallocated column-major matrix of the
+        smallest unsigned integer dtype able to hold them, reading numeric
+        columns in blocks of about 'block_size' values, never copying the
+        dataframe as a whole. Equal-width bins match pd.cut(col, n_bins,
+        right=False, include_lowest=True, labels=False). Returns codes and a
+        dict of bin edges per column, which are only computed if not given.
+        """
+        edges = dict(edges or {})
+        unknown = [col for col in edges if col not in self.binning]
+        assert not unknown, f"Prebinning: edges given for unknown columns {unknown}."
+
+        # Discrete columns first, their number of bins sets the codes dtype
+        for jj, col in enumerate(self.cols):
+            if col not in edges and self.binning[col] in ('integer', 'categorical'):
+                edges[col] = self.fit_edges(self.column_values(df, [jj])[:, 0], self.binning[col])
+        radix = max([self.n_bins] + [self.radix(col, edges[col]) for col in edges])
+        codes = np.empty((self.n_samples, len(self.cols)), dtype=uint_dtype(radix), order='F')
+
+        # Edges and bin indices of blocks of numeric columns at once
+        binned, step = set(), max(1, block_size // max(1, self.n_samples))
+        for mode in ('uniform', 'quantile'):
+            fresh = [jj for jj, col in enumerate(self.cols) if col not in edges and self.binning[col] == mode]
+            for start in range(0, len(fresh), step):
+                block = fresh[start:start + step]
+                values = self.column_values(df, block)
+                fitted = self.fit_edges(values, mode)
+                if mode == 'uniform':
+                    codes[:, block] = self.digitize(values, fitted)
+                    fitted = list(fitted.T)
+                else:
+                    codes[:, block] = np.stack([self.digitize_sorted(vv, ee, len(ee) - 1)
+                                                for vv, ee in zip(values.T, fitted)], axis=1)
+                edges.update({self.cols[jj]: fitted[ii] for ii, jj in enumerate(block)})
+                binned.update(block)
+
+        # Given edges, or of discrete columns, one column at a time
+        for jj, col in enumerate(self.cols):
+            if jj not in binned:
+                codes[:, jj] = self.digitize_column(self.column_values(df, [jj])[:, 0], col, np.asarray(edges[col]))
+        return codes, {col: np.asarray(edges[col]) for col in self.cols}
+
+
+    def setup_columns(self, columns, binning, edges, collapse_onehot: bool) -> dict:
+        """ Sets the columns of the frame, out of those of the input data, with
+        their binning modes and onehot index. Groups of onehot children to be
+        collapsed are kept in 'collapsed', and binned as categorical columns
+        with one bin per child plus one for none. Returns the edges given for
+        the columns, to be completed by prebinning.
+        """
+        groups = {parent: [columns[ii] for ii in children] for parent, children in onehot_index(columns).items()
+                  if all('#' in columns[ii] for ii in children)}
+        self.collapsed = groups if collapse_onehot else {}
+        self.cols = list(dict.fromkeys(col.split('#')[0] if col.split('#')[0] in self.collapsed else col
+                                       for col in columns))
+        self.binning = self.resolve_binning(binning, self.cols)
+        self.binning.update(dict.fromkeys(self.collapsed, 'categorical'))
+        self.onehot = onehot_index(self.cols)
+        defaults = {parent: np.arange(len(children) + 1) for parent, children in self.collapsed.items()}
+        return {**defaults, **dict(edges or {})}
+
+
+    def collapse(self, df: pd.DataFrame) -> pd.DataFrame:
+        """ Replaces each group of onehot children in 'collapsed' by a single
+        column named after their parent, holding the position of the hot child
+        (from 1 onwards, 0 if none is). Sparse children are read by their
+        nonzero entries only.
+        """
+        if not getattr(self, 'collapsed', None):
+            return df
+
+        columns = {}
+        for col in df.columns:
+            parent = col.split('#')[0]
+            if parent not in self.collapsed:
+                columns[col] = df[col]
+            elif parent not in columns:
+                code = np.zeros(len(df), dtype=uint_dtype(len(self.collapsed[parent]) + 1))
+                for jj, child in enumerate(self.collapsed[parent], 1):
+                    hot = self.nonzero_rows(df[child])
+                    assert not code[hot].any(), f"Onehot collapse: rows of '{parent}' with several hot children."
+                    code[hot] = jj
+                columns[parent] = code
+        return pd.DataFrame(columns, index=df.index)
+
+
+    @staticmethod
+    def nonzero_rows(column: pd.Series) -> np.ndarray:
+        """ Positions of the nonzero values of a column, straight out of the
+        stored entries if sparse (unless filled with nonzeros, as missing values
+        of a sparse column are not hot either).
+        """
+        array = column.array
+        if isinstance(column.dtype, pd.SparseDtype) and (not array.fill_value or pd.isna(array.fill_value)):
+            return array.sp_index.to_int_index().indices[array.sp_values != 0]
+        return np.flatnonzero(column.to_numpy())
+
+
+    @staticmethod
+    def resolve_binning(binning, cols: list) -> dict:
+        """ Binning mode of every column, out of a single mode for all of them
+        or a dict of modes per column (missing columns are 'uniform').
+        """
+        if isinstance(binning, str):
+            binning = dict.fromkeys(cols, binning)
+        binning = {col: binning.get(col, 'uniform') for col in cols}
+        unknown = set(binning.values()) - set(mi_frame.binnings)
+        assert not unknown, f"Unknown binning {unknown}, choose from {mi_frame.binnings}."
+        return binning
+
+
+    def column_values(self, df, columns: list) -> np.ndarray:
+        """ Values of some columns of 'df', given by position or by name, as a
+        float matrix unless categorical. Implicit entries of sparse columns
+        are zeros, whichever their fill value. Asserts there are no missing
+        values.
+        """
+        names = [self.cols[cc] if isinstance(cc, (int, np.integer)) else cc for cc in columns]
+        categorical = any(self.binning[col] == 'categorical' for col in names)
+        block = df.iloc[:, columns] if names != columns else df[names]
+        values = block.to_numpy() if categorical else block.to_numpy(dtype=np.float64)
+
+        # Sparse columns filled with NaN, rebuilt out of their stored entries
+        for jj, (__, column) in enumerate(block.items()):
+            if isinstance(column.dtype, pd.SparseDtype) and pd.isna(column.array.fill_value):
+                array = column.array
+                values = values if values.flags.writeable else values.copy()
+                values[:, jj] = 0
+                values[array.sp_index.to_int_index().indices, jj] = array.sp_values
+        assert not pd.isna(values).any(), "Prebinning: missing values are not supported."
+        return values
+
+
+    def fit_edges(self, values: np.ndarray, mode: str) -> np.ndarray:
+        """ Bin edges of a block of columns, of shape [n_bins + 1, n_columns]
+        if 'uniform', or a list of the edges of each column if 'quantile'
+        (without repeats, so maybe fewer). Edges of a single column for
+        discrete modes: its distinct values, plus an upper bound if 'integer'.
+        """
+        if mode == 'uniform':
+            return self.bin_edges(values.min(axis=0), values.max(axis=0), self.n_bins)
+        if mode == 'quantile':
+            fitted = np.quantile(values, np.linspace(0, 1, self.n_bins + 1), axis=0)
+            return [self.unique_edges(block) for block in fitted.T]
+        uniques = np.unique(values)
+        return np.append(uniques, uniques[-1] + 1) if mode == 'integer' else uniques
+
+
+    def radix(self, col, edges=None) -> int:
+        """ Number of bins of a column, given its edges (its own by default).
+        Discrete columns have one bin per known value, plus one for unseen.
+        """
+        edges = self.edges[col] if edges is None else edges
+        if self.binning[col] in ('integer', 'categorical'):
+            return len(self.vocabulary(col, edges)) + 1
+        return len(edges) - 1
+
+
+    def vocabulary(self, col, edges) -> np.ndarray:
+        """ Sorted values known to a discrete column, out of its edges (those
+        of 'integer' columns end with an upper bound).
+        """
+        return edges if self.binning[col] == 'categorical' else edges[:-1]
+
+
+    def digitize_column(self, values: np.ndarray, col, edges: np.ndarray) -> np.ndarray:
+        """ Bin indices of the values of a single column, given its edges.
+        Discrete columns only take exact matches, any other value falls in
+        their last bin, of unseen values.
+        """
+        if self.binning[col] not in ('integer', 'categorical'):
+            return self.digitize_sorted(values, edges, self.radix(col, edges))
+        known = self.vocabulary(col, edges)
+        code = np.clip(np.searchsorted(known, values), 0, len(known) - 1)
+        return np.where(known[code] == values, code, len(known))
+
+
+    def bin_rows(self, df: pd.DataFrame) -> np.ndarray:
+        """ Bin indices of new rows, with the frozen edges of every column.
+        """
+        codes = np.empty((len(df), len(self.cols)), dtype=uint_dtype(max(self.radices)), order='F')
+        for jj, col in enumerate(self.cols):
+            codes[:, jj] = self.digitize_column(self.column_values(df, [col])[:, 0], col, self.edges[col])
+        return codes
+
+
+    @staticmethod
+    def bin_edges(mn: np.ndarray, mx: np.ndarray, n_bins: int) -> np.ndarray:
+        """ Edges of 'n_bins' equal-width bins for each column with extremes 'mn'
+        and 'mx', computed exactly as pd.cut(..., right=False) does.
+        Returns an array of shape [n_bins + 1, n_columns].
+        """
+        mn, mx = mn.astype(np.float64), mx.astype(np.float64)
+        flat = mn == mx
+
+        # Constant columns widen their range by 0.1% before binning...
+        lo = np.where(flat, mn - np.where(mn != 0, 0.001 * np.abs(mn), 0.001), mn)
+        hi = np.where(flat, mx + np.where(mx != 0, 0.001 * np.abs(mx), 0.001), mx)
+        edges = np.linspace(lo, hi, n_bins + 1, axis=0)
+
+        # ...others only have their last edge moved 0.1% so the max fits in
+        edges[-1] += np.where(flat, 0, (mx - mn) * 0.001)
+        return edges
+
+
+    @staticmethod
+    def unique_edges(edges: np.ndarray) -> np.ndarray:
+        """ Quantile edges of a column without repeats, which heavy ties (eg.
+        zero-inflated columns) produce and would leave their bins empty and
+        the tied values in the last one. Constant columns keep a single bin.
+        """
+        edges = np.unique(edges)
+        return edges if len(edges) > 1 else edges[[0, 0]]
+
+
+    @staticmethod
+    def digitize(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+        """ Bin index of each value, as the last edge of its column which is
+        less or equal than it. Guessed arithmetically, then corrected against
+        the actual edges for floating point rounding. Values out of the edges
+        range are clipped to the first or last bin.
+        """
+        n_bins = len(edges) - 1
+        lo, width = edges[0], edges[-1] - edges[0]
+        code = np.clip(np.floor((values - lo) / width * n_bins), 0, n_bins - 1).astype(np.intp)
+        code -= values < np.take_along_axis(edges, code, axis=0)
+        code += (code < n_bins - 1) & (values >= np.take_along_axis(edges, code + 1, axis=0))
+        return np.clip(code, 0, n_bins - 1, out=code)
+
+
+    @staticmethod
+    def digitize_sorted(values: np.ndarray, edges: np.ndarray, n_bins: int) -> np.ndarray:
+        """ Same as 'digitize' for the edges of a single column, of any spacing
+        or type (eg. quantiles or categories), by binary search. Values are
+        clipped to the 'n_bins' available bins.
+        """
+        return np.clip(np.searchsorted(edges, values, side='right') - 1, 0, n_bins - 1)
+
+
+    def encode(self, feats: list, code=None, card=1):
+        """ Mixes the binned columns of 'feats' into a single dense integer
+        code using their known numbers of bins as radices, optionally on top of
+        the code of a base feature set. Returns code and cardinality.
+        """
+        columns = [self.codes[:, self.index[ff]] for ff in feats]
+        radices = [self.radices[self.index[ff]] for ff in feats]
+        return joint_code(columns, radices, self.n_samples, code, card)
+
+
+    def encode_set(self, feats: list, parent=None) -> encoded_set:
+        """ Encodes 'feats' as a list carrying their joint code. If 'parent' is
+        an encoded set which 'feats' extends, only the newly added features
+        are mixed on top of its code, which is then re-densified.
+        """
+        feats = list(feats)
+        if self.engine != 'numpy' or self.tabled:
+            return encoded_set(feats)
+
+        # Reuse the parent code if feats just appends some features to it
+        if isinstance(parent, encoded_set) and parent.code is not None \
+                and feats[:len(parent)] == list(parent):
+            new = onehot_children(self.cols, feats[len(parent):], self.onehot)
+            code, card = self.encode(new, parent.code, parent.card)
+        else:
+            code, card = self.encode(onehot_children(self.cols, feats, self.onehot))
+        return encoded_set(feats, code, card)
+
+
+    def encode_carried(self, feats: list):
+        """ Joint code of 'feats', reusing the one they carry if encoded sets.
         """
-        binned = df.copy()
-        for __, feat in enumerate(self.cols):
-            binned[feat] = \
-                pd.cut(binned[feat],
-                       self.n_bins,
-                       precision=self.n_digits,
-                       right=False,
-                       labels=False,
-                       include_lowest=True)
-        return binned
+        if isinstance(feats, encoded_set) and feats.code is not None:
+            return feats.code, feats.card
+        return self.encode(onehot_children(self.cols, feats, self.onehot))
+
+
+    def mi_many(self, base_set: list, candidates: list, targets: list, h_norm=False):
+        """ Batched I([*base_set, c]; targets) for every c in 'candidates'. The
+        joint codes of the base set and the targets are computed only once and
+        shared by all candidates. Returns a vector of MIs, same as __call__.
+        Base set and targets may be 'encode_set' outputs to reuse their codes.
+        """
+        assert isinstance(base_set, list), f"Computing MI: Provided 'base_set' not list: {base_set}."
+        assert isinstance(candidates, list), f"Computing MI: Provided 'candidates' not list: {candidates}."
+        assert isinstance(targets, list), f"Computing MI: Provided 'targets' not list: {targets}."
+
+        # Engines without integer codes, or MIs out of tables, are simply looped over
+        if self.engine != 'numpy' or self.tabled:
+            return np.array([self([*base_set, cc], targets, h_norm=h_norm) for cc in candidates])
+
+        # Shared precomputation: encode base set and targets once (unless carried)
+        tic = perf_counter()
+        cb, nb = self.encode_carried(base_set)
+        cy, ny = self.encode_carried(targets)
+
+        scores, computed, cells = np.empty(len(candidates)), 0, 0
+        for ii, cc in enumerate(candidates):
+
+            # Prefer memoized values, when caching
+            value = None
+            if self.cache is not None:
+                key = self.cache.key([*base_set, cc], targets, h_norm)
+                value = self.cache.get(key)
+
+            # Else out of a tracked table, or mixing only the candidate on top of the base code
+            if value is None:
+                feat_x = onehot_children(self.cols, [*base_set, cc], self.onehot)
+                feat_y = onehot_children(self.cols, targets, self.onehot)
+                if self.tracked and self.covering([*feat_x, *feat_y]) is not None:
+                    value, pxy = self.countbased_mutualinfo(feat_x, feat_y, h_norm)
+                else:
+                    cx, nx = self.encode(onehot_children(self.cols, [cc], self.onehot), cb, nb)
+                    value, pxy = self.codebased_mutualinfo(cx, nx, cy, ny, h_norm)
+                computed, cells = computed + 1, cells + len(pxy)
+                if self.cache is not None:
+                    self.cache.put(key, value)
+            scores[ii] = value
+
+        assert (scores >= 0).all(), f'Mutual information yields negative value: {scores.min()}'
+        if self.stats is not None:
+            self.stats.add_time('mi.many', perf_counter() - tic)
+            self.stats.count('mi.many_candidates', len(candidates))
+            self.stats.count('mi.cache_hits', len(candidates) - computed if self.cache is not None else 0)
+            self.stats.count('mi.rows', self.n_samples * computed)
+            self.stats.count('mi.cells', cells)
+        return scores
 
 
     def samplebased_mutualinfo(self, feat_x: list, feat_y: list, h_norm=False):
         """ Computes the standard mutual information across two random vectors
         X and Y, I(X;Y). If 'h_norm' returns I(X;Y)/H(*X,*Y) instead.
         """
+        if self.tabled or self.covering([*feat_x, *feat_y]) is not None:
+            return self.countbased_mutualinfo(feat_x, feat_y, h_norm)
+        if self.engine == 'numpy':
+            return self.codebased_mutualinfo(*self.encode(feat_x), *self.encode(feat_y), h_norm)
+
         # Sample-based-estimate pdfs, compute base MI & entropy-normalize if so
         bb  = self.pdf_estimation(self.binned, feat_x, feat_y)
         mi  = self.mutualinformation(bb)
@@ -76,6 +755,45 @@ class mi_frame:
         return mi.round(self.n_digits), bb.pxy
 
 
+    def codebased_mutualinfo(self, cx, nx, cy, ny, h_norm=False):
+        """ Numpy engine counterpart of 'samplebased_mutualinfo', taking the
+        dense joint codes of X and Y together with their cardinalities.
+        """
+        # Same integrals as the pandas engine, only over occupied cell counts
+        mi, h, pxy = information(cx, nx, cy, ny, self.n_samples)
+        mi /= h if h_norm else 1
+        return mi.round(self.n_digits), pxy
+
+
+    def countbased_mutualinfo(self, feat_x: list, feat_y: list, h_norm=False):
+        """ Count table counterpart of 'samplebased_mutualinfo'. Takes the
+        table of a tracked superset of X and Y, else counts their bins, which
+        are accumulated over blocks of rows when streaming, never holding
+        whole columns. MI is then integrated out of the table.
+        """
+        cols = list(dict.fromkeys([*feat_x, *feat_y]))
+        table = self.covering(cols)
+        table = self.counts(cols) if table is None else table
+        mi, h, pxy = table.information(feat_x, feat_y)
+        mi /= h if h_norm else 1
+        return mi.round(self.n_digits), pxy
+
+
+    def counts(self, cols: list) -> count_table:
+        """ Joint count table of the bins of 'cols' over all rows, counted in
+        blocks of 'chunk_rows' when streaming, and weighted once decayed.
+        Tables of frames holding different rows of a dataset add up to the
+        table of the whole of it.
+        """
+        idx = [self.index[ff] for ff in cols]
+        radix = max(self.radices[ii] for ii in idx)
+        step = self.chunk_rows or self.n_samples
+        blocks = [slice(start, start + step) for start in range(0, self.n_samples, step)]
+        weights = lambda rows : None if self.weights is None else self.weights[rows]
+        return sum(count_table.from_codes(cols, np.asarray(self.codes[rows, idx]), radix, weights(rows))
+                   for rows in blocks)
+
+
     @staticmethod
     def pdf_estimation(binned: pd.DataFrame, feat_x: list, feat_y: list):
         """ Sample-based multivariable probability distribution estimator.
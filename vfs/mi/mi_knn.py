@@ -0,0 +1,141 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from scipy.special import digamma
+from .onehot import onehot_enable, onehot_index
+from .cache import mi_cache, cache_enable
+
+
+class mi_knn:
+    """ Kraskov-Stögbauer-Grassberger (KSG) k-nearest-neighbor estimator of the
+    MI between continuous random vectors, usable as 'mi_fun' by all selectors
+    and losses. No binning is involved, so it holds up for vectors of many
+    dimensions, where joint histogram bins would mostly be singletons.
+
+    # Example
+    mi_fun = mi_knn(df, k=3, workers=-1)
+    mi_val = mi_fun(features, targets)
+
+    For each sample, the distance to its k-th nearest neighbor in the joint
+    (X, Y) space is found, then the samples closer than that in the X and Y
+    spaces are counted (algorithm 1 of the KSG paper, max-norm). Neighbor
+    queries run on scipy's cKDTree for all samples at once, over 'workers'
+    threads (-1 for all cores). Trees are kept for the last 'maxtrees' sets of
+    features, so the sets used over and over by the selectors (eg. the
+    targets) are only built once. Features are scaled to unit variance and
+    jittered by a tiny deterministic noise which breaks ties between repeated
+    values.
+
+    Since differential entropies are not normalizing bounds of MI, 'h_norm'
+    returns the information coefficient of correlation sqrt(1 - exp(-2 I))
+    instead, which also lies in [0, 1).
+    """
+    def __init__(self, df: pd.DataFrame, k=3, n_digits=3, workers=1, cache=None, maxtrees=32, seed=0):
+        """ Loads base arguments and scales the data for later use.
+        """
+        assert 0 < k < len(df), f"KSG estimator: needs 0 < k < n_samples, got k={k}."
+
+        # Base hyper params
+        self.k = k
+        self.n_digits = n_digits
+        self.workers = workers
+        self.maxtrees = maxtrees
+
+        # Unit variance data, plus a tiny noise breaking ties among repeated values
+        self.cols = df.columns.to_list()
+        self.n_samples = len(df)
+        values = df.to_numpy(dtype=np.float64)
+        assert not np.isnan(values).any(), "KSG estimator: missing values are not supported."
+        scale = values.std(axis=0)
+        values = (values - values.mean(axis=0)) / np.where(scale > 0, scale, 1)
+        values += 1e-10 * np.random.default_rng(seed).standard_normal(values.shape)
+        self.data = np.asfortranarray(values)
+        self.index = {col: ii for ii, col in enumerate(self.cols)}
+        self.onehot = onehot_index(self.cols)
+        self.trees = OrderedDict()
+        self.lock = threading.Lock()
+
+        # Optional memoization, tied to this very dataset and settings
+        self.cache = mi_cache.resolve(cache)
+        if self.cache is not None:
+            self.cache.bind(self.fingerprint(), self)
+
+
+    @cache_enable
+    @onehot_enable
+    def __call__(self, feat_x: list, feat_y: list, h_norm=False) -> float:
+        """ Base instance operation. Checks healthy inputs and then runs MI.
+        """
+        assert isinstance(feat_x, list), f"Computing MI: Provided 'feat_x' not list: {feat_x}."
+        assert isinstance(feat_y, list), f"Computing MI: Provided 'feat_y' not list: {feat_y}."
+        assert isinstance(h_norm, bool), f"Computing MI: Provided 'h_norm' not bool: {h_norm}."
+
+        mi = self.ksg(feat_x, feat_y)
+        if h_norm:
+            mi = np.sqrt(1 - np.exp(-2 * mi))
+        return np.round(mi, self.n_digits)
+
+
+    def ksg(self, feat_x: list, feat_y: list) -> float:
+        """ KSG estimate of I(X;Y), clipped at zero.
+        """
+        if not feat_x or not feat_y:
+            return 0.0
+
+        # Distance of every sample to its k-th neighbor in joint space, itself apart
+        joint = self.tree([*feat_x, *feat_y])
+        eps = joint.query(joint.data, k=self.k + 1, p=np.inf, workers=self.workers)[0][:, -1]
+
+        # Samples strictly closer than that in each marginal space, itself included
+        radius = np.nextafter(eps, 0)
+        counts = []
+        for feats in (feat_x, feat_y):
+            tree = self.tree(feats)
+            counts.append(tree.query_ball_point(tree.data, radius, p=np.inf, return_length=True, workers=self.workers))
+
+        mi = digamma(self.k) + digamma(self.n_samples) - np.mean(digamma(counts[0]) + digamma(counts[1]))
+        return max(0.0, float(mi))
+
+
+    def tree(self, feats: list) -> cKDTree:
+        """ KD-tree over the columns of 'feats', reused if recently built. The
+        LRU of trees is shared by threads, which build missing ones unlocked.
+        """
+        key = tuple(feats)
+        with self.lock:
+            if key in self.trees:
+                self.trees.move_to_end(key)
+                return self.trees[key]
+
+        tree = cKDTree(self.data[:, [self.index[ff] for ff in feats]])
+        with self.lock:
+            self.trees[key] = tree
+            self.trees.move_to_end(key)
+            while len(self.trees) > self.maxtrees:
+                self.trees.popitem(last=False)
+        return tree
+
+
+    def fingerprint(self) -> str:
+        """ Digest of the data and settings, see 'mi_frame.fingerprint'.
+        """
+        digest = hashlib.sha1(repr(('knn', self.cols, self.k, self.n_digits)).encode())
+        digest.update(self.data.tobytes(order='F'))
+        return digest.hexdigest()
+
+
+    def __getstate__(self):
+        """ Trees are not pickled, workers rebuild the ones they need.
+        """
+        state = self.__dict__.copy()
+        state['trees'] = OrderedDict()
+        del state['lock']
+        return state
+
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
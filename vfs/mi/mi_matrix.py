@@ -0,0 +1,168 @@
+import os
+import json
+import multiprocessing as mp
+import numpy as np
+from .mi_frame import mi_frame
+from .onehot import onehot_children
+from .codes import information
+from .shared import sharing
+
+
+# Worker-side copy of the row computation context, sent once per process
+_context = {}
+
+
+def _init_worker(mi_fun, features, targets):
+    """ Pool initializer: keeps the prebinned data in the worker process.
+    """
+    _context.update(mi_fun=mi_fun, features=features, targets=targets)
+
+
+def _matrix_row(ii: int):
+    """ Computes row 'ii' of the tables: I(Xi;Y), I(Xi;Xi) and, for every
+    later feature j > i, I(Xi;Xj) and I(Xi,Xj;Y). Both raw and entropy-
+    normalized values are returned, each stacked as [raw, h_norm].
+    """
+    mi_fun, features = _context['mi_fun'], _context['features']
+    cy, ny = mi_fun.encode_carried(_context['targets'])
+    ci, ni = mi_fun.encode_carried([features[ii]])
+
+    # Relevance of Xi and its self-information
+    relevance = information(ci, ni, cy, ny, mi_fun.n_samples)[:2]
+    self_info = information(ci, ni, ci, ni, mi_fun.n_samples)[:2]
+
+    redundancy, joint = [], []
+    for feat in features[ii + 1:]:
+        cj, nj = mi_fun.encode_carried([feat])
+        redundancy.append(information(ci, ni, cj, nj, mi_fun.n_samples)[:2])
+        cij, nij = mi_fun.encode(onehot_children(mi_fun.cols, [feat], mi_fun.onehot), ci, ni)
+        joint.append(information(cij, nij, cy, ny, mi_fun.n_samples)[:2])
+
+    # Turn (mi, h) pairs into [mi, mi/h] pairs
+    normalize = lambda pairs : np.array([[mi, mi / h] for mi, h in pairs]).reshape(-1, 2).T
+    return normalize([relevance]), normalize([self_info]), normalize(redundancy), normalize(joint)
+
+
+class mi_matrix:
+    """ Precomputed bivariate and trivariate MI tables, for the losses which only
+    ever need I(Xi;Y), I(Xi;Xj) and I(Xi,Xj;Y) (eg. MRMR, JMI, JMIM, DISR).
+    All of them are computed once and stored as dense arrays indexed by feature,
+    so an instance can be used as 'mi_fun' and each MI becomes a lookup. Tables
+    can be saved to and memory-mapped back from '.npy' files.
+
+    # Example
+    mi_fun = mi_matrix(df, features, targets, processes=4)
+    mi_fun.save('iris_tables')
+    forward_selector(df, features, targets, k=3, loss=jmim, mi_fun=mi_fun)
+
+    Queries out of the tables are forwarded to the underlying 'mi_frame', when
+    there is one (ie. not after 'load', unless provided).
+    """
+    tables = ('relevance', 'redundancy', 'joint')
+
+    def __init__(self, df, features: list, targets: list, processes=None, **kwargs):
+        """ Builds the tables from a dataframe (prebinned with 'kwargs') or from
+        an already built 'mi_frame'. Rows are spread over a process pool of
+        'processes' workers, if given.
+        """
+        self.mi_fun = df if isinstance(df, mi_frame) else mi_frame(df, **kwargs)
+        assert self.mi_fun.engine == 'numpy', "MI matrix: requires an 'mi_frame' with the numpy engine."
+        self.features = list(features)
+        self.targets = list(targets)
+        self.n_digits = self.mi_fun.n_digits
+        self.index = {feat: ii for ii, feat in enumerate(self.features)}
+
+        # Compute every table row, serially or over a pool sharing the data
+        rows = range(len(self.features))
+        if processes:
+            with sharing(self.mi_fun) as shared:
+                args = (shared, self.features, self.targets)
+                with mp.Pool(processes, initializer=_init_worker, initargs=args) as pool:
+                    results = pool.map(_matrix_row, rows)
+        else:
+            _init_worker(self.mi_fun, self.features, self.targets)
+            results = [_matrix_row(ii) for ii in rows]
+            _context.clear()
+
+        # Fill symmetric tables, with shape [2 (raw, h_norm), nfeats, nfeats]
+        nf = len(self.features)
+        self.relevance = np.zeros((2, nf))
+        self.redundancy = np.zeros((2, nf, nf))
+        self.joint = np.zeros((2, nf, nf))
+        for ii, (rel, self_info, red, jnt) in enumerate(results):
+            self.relevance[:, ii] = rel[:, 0]
+            self.redundancy[:, ii, ii] = self_info[:, 0]
+            self.redundancy[:, ii, ii+1:] = self.redundancy[:, ii+1:, ii] = red
+            self.joint[:, ii, ii+1:] = self.joint[:, ii+1:, ii] = jnt
+
+        # I(Xi,Xi;Y) is just I(Xi;Y). Round as mi_frame would
+        for hh in range(2):
+            np.fill_diagonal(self.joint[hh], self.relevance[hh])
+        for table in self.tables:
+            setattr(self, table, getattr(self, table).round(self.n_digits))
+
+
+    def __call__(self, feat_x: list, feat_y: list, h_norm=False) -> float:
+        """ Looks up I(X;Y) from the tables, else falls back to the mi_frame.
+        """
+        hh = int(h_norm)
+        for xx, yy in [(feat_x, feat_y), (feat_y, feat_x)]:
+            if set(yy) == set(self.targets) and 0 < len(xx) < 3 and self.known(xx):
+                ii, jj = self.index[xx[0]], self.index[xx[-1]]
+                return self.joint[hh, ii, jj]
+            if len(xx) == len(yy) == 1 and self.known(xx + yy):
+                return self.redundancy[hh, self.index[xx[0]], self.index[yy[0]]]
+
+        assert self.mi_fun is not None, f"MI matrix: I({feat_x};{feat_y}) not in tables."
+        return self.mi_fun(feat_x, feat_y, h_norm=h_norm)
+
+
+    def mi_many(self, base_set: list, candidates: list, targets: list, h_norm=False):
+        """ Batched I([*base_set, c]; targets) for every c in 'candidates', by
+        fancy indexing the tables. Same contract as 'mi_frame.mi_many'.
+        """
+        hh = int(h_norm)
+        if self.known(candidates) and self.known(base_set):
+            idx = [self.index[cc] for cc in candidates]
+            if set(targets) == set(self.targets) and len(base_set) < 2:
+                row = self.index[base_set[0]] if base_set else idx
+                return self.joint[hh, row, idx]
+            if not base_set and len(targets) == 1 and self.known(targets):
+                return self.redundancy[hh, self.index[targets[0]], idx]
+
+        assert self.mi_fun is not None, f"MI matrix: I({base_set}+c;{targets}) not in tables."
+        return self.mi_fun.mi_many(base_set, candidates, targets, h_norm=h_norm)
+
+
+    def known(self, feats: list) -> bool:
+        """ Whether all 'feats' are rows of the tables.
+        """
+        return all(ff in self.index for ff in feats)
+
+
+    def save(self, path: str):
+        """ Stores the tables as '.npy' files plus a json header in 'path'.
+        """
+        os.makedirs(path, exist_ok=True)
+        for table in self.tables:
+            np.save(os.path.join(path, f'{table}.npy'), getattr(self, table))
+        header = {'features': self.features, 'targets': self.targets, 'n_digits': self.n_digits}
+        with open(os.path.join(path, 'header.json'), 'w') as fh:
+            json.dump(header, fh)
+
+
+    @classmethod
+    def load(cls, path: str, mi_fun=None, mmap_mode='r'):
+        """ Restores tables stored with 'save', memory-mapped by default. An
+        'mi_fun' may be attached to answer queries out of the tables.
+        """
+        self = cls.__new__(cls)
+        with open(os.path.join(path, 'header.json')) as fh:
+            header = json.load(fh)
+        self.features, self.targets = header['features'], header['targets']
+        self.n_digits = header['n_digits']
+        self.index = {feat: ii for ii, feat in enumerate(self.features)}
+        self.mi_fun = mi_fun
+        for table in self.tables:
+            setattr(self, table, np.load(os.path.join(path, f'{table}.npy'), mmap_mode=mmap_mode))
+        return self
@@ -1,32 +1,258 @@
 import numpy as np
-import pandas as pd
 import torch
 from .mi_frame import mi_frame
+from .onehot import onehot_children
+from .codes import MAX_CARDINALITY, BINCOUNT_DENSITY
 import warnings
+from time import perf_counter
+
+
+# Max number of code values (subsets x samples) mixed per batch launch. Kept
+# cache-sized, since counting is bound by memory bandwidth on CPU
+BATCH_VALUES = 2 ** 20
 
 
 class mi_tensor(mi_frame):
     """ MI GPU implementation on torch, forked off the cpu pandas method. This
     class substitutes inherits the init + prebinning + call and substitutes the
     other methods. See parent class for documentation.
+
+    The binned data is held on the device as a resident integer tensor, so
+    calls only move the resulting MI back. The default 'torch' engine mixes
+    the columns of X and Y into int64 keys and counts them with bincount,
+    same as the numpy engine of 'mi_frame'. The 'legacy' engine runs the
+    original estimator, built on repeated torch.unique calls.
+
+    Many feature subsets can be scored at once with 'batch', which is also
+    used by 'mi_many', so that torch runs a few bulk operations instead of
+    dispatching small ones per subset.
     """
-    def __init__(self, *args, gpu=True, **kwargs):
-        super().__init__(*args, **kwargs)
-        # Boot gpu if arg + allowed
-        use_gpu = gpu and torch.cuda.is_available()
-        self.device = 'cuda' if use_gpu else 'cpu'
+    engines = ('torch', 'legacy')
+
+    def __init__(self, *args, gpu=True, engine='torch', **kwargs):
+        super().__init__(*args, engine=engine, **kwargs)
+        self.device = self.boot_device(gpu)
+
+        # Binned data lives on the device, in a torch-supported int dtype
+        self.tensor = self.to_device(self.codes)
 
+
+    @classmethod
+    def from_chunks(cls, chunks, gpu=True, engine='torch', **kwargs):
+        """ Streams a dataset as 'mi_frame.from_chunks' does. Its MIs are then
+        accumulated out of count tables, so codes stay on disk and no resident
+        tensor is built.
+        """
+        assert engine in cls.engines, f"Unknown MI engine '{engine}', choose from {cls.engines}."
+        self = super().from_chunks(chunks, **kwargs)
+        self.engine = engine
+        self.device = self.boot_device(gpu)
+        self.tensor = None
+        return self
+
+
+    @staticmethod
+    def boot_device(gpu: bool) -> str:
+        """ Boot gpu if arg + allowed.
+        """
         if gpu and not torch.cuda.is_available():
             warnings.warn("Attempted MI on GPU, but no device found: using CPU.")
+        return 'cuda' if gpu and torch.cuda.is_available() else 'cpu'
+
+
+    def to_device(self, codes: np.ndarray) -> torch.Tensor:
+        """ Moves the binned code matrix to the device, once, transposed so that
+        each column of data is a contiguous row of the tensor.
+        """
+        dtype = np.uint8 if codes.dtype == np.uint8 else np.int32 if codes.dtype.itemsize < 4 else np.int64
+        return torch.from_numpy(np.ascontiguousarray(codes.T, dtype=dtype)).to(self.device)
+
+
+    def __getstate__(self):
+        """ The resident tensor is rebuilt from the codes on unpickling.
+        """
+        state = super().__getstate__()
+        state.pop('tensor', None)
+        return state
+
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.tensor = None if self.streaming else self.to_device(self.codes)
+
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.tensor = self.to_device(self.codes)
+        return self
+
+
+    def subsample(self, *args, **kwargs):
+        sample = super().subsample(*args, **kwargs)
+        sample.tensor = sample.to_device(sample.codes)
+        return sample
 
 
     def samplebased_mutualinfo(self, feat_x: list, feat_y: list, h_norm=False):
-        Px, Py, Pxy = self.pdf_estimation(self.binned, feat_x, feat_y, self.device)
-        mi  = self.mutualinformation(Px, Py, Pxy)
-        mi /= self.mutualentropy(Pxy) if h_norm else 1
+        if self.tabled or self.covering([*feat_x, *feat_y]) is not None:
+            return self.countbased_mutualinfo(feat_x, feat_y, h_norm)
+
+        if self.engine == 'torch':
+            mi, h, Pxy = self.tensor_information(*self.tensor_code(feat_x), *self.tensor_code(feat_y))
+        else:
+            Px, Py, Pxy = self.pdf_estimation(self.binned, feat_x, feat_y, self.device)
+            mi, h = self.mutualinformation(Px, Py, Pxy), self.mutualentropy(Pxy)
+
+        mi /= h if h_norm else 1
         return mi.cpu().numpy().round(self.n_digits), Pxy
 
 
+    def tensor_code(self, feats: list, code=None, card=1):
+        """ Torch counterpart of 'encode': mixes the resident columns of 'feats'
+        into a single int64 code, densified with torch.unique only if its
+        cardinality exceeds the number of samples. Returns code and cardinality.
+        """
+        if code is None:
+            code = torch.zeros(self.n_samples, dtype=torch.int64, device=self.device)
+        for ff in feats:
+            radix = self.radices[self.index[ff]]
+            if card * radix > MAX_CARDINALITY:
+                code, card = self.densify(code)
+            code = code * radix + self.tensor[self.index[ff]]
+            card *= radix
+        return self.densify(code) if card > self.n_samples else (code, card)
+
+
+    @staticmethod
+    def densify(code: torch.Tensor):
+        """ Relabels a code onto the contiguous range [0, n_unique).
+        """
+        uniques, code = torch.unique(code, return_inverse=True)
+        return code, len(uniques)
+
+
+    def tensor_information(self, cx, nx, cy, ny):
+        """ I(X;Y), H(X,Y) and joint pmf of the occupied cells from the dense
+        codes of X and Y, counted with bincount, or a single unique if sparse.
+        """
+        joint = cx * ny + cy
+        if nx * ny <= BINCOUNT_DENSITY * self.n_samples:
+            counts = torch.bincount(joint, minlength=nx * ny)
+            cells = torch.nonzero(counts).squeeze(1)
+            cxy = counts[cells]
+        else:
+            cells, cxy = torch.unique(joint, return_counts=True)
+
+        # Probabilities in double precision, same as numpy
+        Px = torch.bincount(cx, minlength=nx)[cells // ny].double() / self.n_samples
+        Py = torch.bincount(cy, minlength=ny)[cells % ny].double() / self.n_samples
+        Pxy = cxy.double() / self.n_samples
+        return self.mutualinformation(Px, Py, Pxy), self.mutualentropy(Pxy), Pxy
+
+
+    def batch(self, subsets: list, targets: list, h_norm=False):
+        """ I(S;targets) and H(S,targets) for every subset S in 'subsets'. Codes
+        of subsets of the same size are stacked into a 2-D key tensor, each
+        row offset by its subset id, and all of them counted by one segmented
+        bincount (or a single unique, for sparse tables). Returns a vector of
+        MIs, rounded as __call__ does and normalized if 'h_norm', and another
+        of joint entropies. Subsets whose MIs come out of count tables (of
+        streamed or decayed frames, or tracked columns) are scored one at a
+        time, as __call__ does.
+        """
+        tic = perf_counter()
+        subsets = [onehot_children(self.cols, ss, self.onehot) for ss in subsets]
+        targets = onehot_children(self.cols, targets, self.onehot)
+        mis, hs, cells = np.empty(len(subsets)), np.empty(len(subsets)), 0
+
+        # Count tables, not the resident tensor, hold the right counts of some
+        sizes = {}
+        for ii, ss in enumerate(subsets):
+            if self.tabled or self.covering([*ss, *targets]) is not None:
+                mis[ii], pxy = self.samplebased_mutualinfo(ss, targets, h_norm)
+                hs[ii], cells = -np.sum(pxy * np.log(pxy)), cells + len(pxy)
+            else:
+                sizes.setdefault(len(ss), []).append(ii)
+
+        # Group the others by size, then launch as many as fit in memory at once
+        cy, ny = self.tensor_code(targets) if sizes else (None, None)
+        for size, ids in sizes.items():
+            step = max(1, BATCH_VALUES // (max(1, size) * self.n_samples))
+            for start in range(0, len(ids), step):
+                part = ids[start:start + step]
+                mi, h, occupied = self.segmented_information([subsets[ii] for ii in part], cy, ny)
+                mi, h = mi.cpu().numpy(), h.cpu().numpy()
+                mis[part], hs[part], cells = mi / h if h_norm else mi, h, cells + occupied
+
+        if self.stats is not None:
+            self.stats.add_time('mi.batch', perf_counter() - tic)
+            self.stats.count('mi.batch_subsets', len(subsets))
+            self.stats.count('mi.rows', self.n_samples * len(subsets))
+            self.stats.count('mi.cells', cells)
+        return mis.round(self.n_digits), hs
+
+
+    def segmented_information(self, subsets: list, cy, ny):
+        """ MIs and joint entropies with the target code 'cy' of several subsets
+        of the same size, counted all together, and their total number of
+        occupied joint cells. Subset codes are mixed in a single vectorized
+        pass when their key range fits in int64, else one by one and
+        densified.
+        """
+        n_subsets, k = len(subsets), len(subsets[0])
+        idx = [[self.index[ff] for ff in ss] for ss in subsets]
+        card = max(int(np.prod([self.radices[ii] for ii in row], dtype=object)) for row in idx)
+        if card * ny * n_subsets <= MAX_CARDINALITY:
+            radices = [[self.radices[ii] for ii in row] for row in idx]
+            radices = torch.tensor(radices, dtype=torch.int64, device=self.device).reshape(n_subsets, k)
+            idx = torch.tensor(idx, dtype=torch.int64, device=self.device).reshape(n_subsets, k)
+            cx = torch.zeros((n_subsets, self.n_samples), dtype=torch.int64, device=self.device)
+            for jj in range(k):
+                cx.mul_(radices[:, jj, None]).add_(self.tensor[idx[:, jj]])
+        else:
+            codes = [self.tensor_code(ss) for ss in subsets]
+            cx, card = torch.stack([code for code, __ in codes]), max(card for __, card in codes)
+
+        # Joint (subset, x, y) keys, each subset on its own range of cells
+        width = card * ny
+        offset = torch.arange(n_subsets, device=self.device)[:, None] * width
+        keys = cx.mul_(ny).add_(cy).add_(offset).reshape(-1)
+
+        if width <= BINCOUNT_DENSITY * self.n_samples:
+            # Dense: one bincount, marginals summing the [subset, x, y] grid
+            Pxy = torch.bincount(keys, minlength=n_subsets * width).reshape(n_subsets, card, ny).double()
+            Pxy /= self.n_samples
+            Px, Py = Pxy.sum(dim=2, keepdim=True), Pxy.sum(dim=1, keepdim=True)
+            occupied = Pxy > 0
+            mi = torch.where(occupied, Pxy * torch.log(Pxy / Px / Py), 0).sum(dim=(1, 2))
+            h = torch.where(occupied, -Pxy * torch.log(Pxy), 0).sum(dim=(1, 2))
+            return mi, h, int(occupied.sum())
+
+        # Sparse: one unique. Sorted cells keep each (subset, x) consecutive
+        cells, cxy = torch.unique(keys, return_counts=True)
+        segment, within = cells // width, cells % width
+        sx = torch.unique_consecutive(segment * card + within // ny, return_inverse=True)[1]
+        sy = segment * ny + within % ny
+        cxy = cxy.double()
+        cx = torch.zeros(int(sx.max()) + 1, dtype=torch.float64, device=self.device).scatter_add_(0, sx, cxy)[sx]
+        cy = torch.zeros(n_subsets * ny, dtype=torch.float64, device=self.device).scatter_add_(0, sy, cxy)[sy]
+
+        Pxy, Px, Py = cxy / self.n_samples, cx / self.n_samples, cy / self.n_samples
+        mi = torch.zeros(n_subsets, dtype=torch.float64, device=self.device)
+        h = torch.zeros(n_subsets, dtype=torch.float64, device=self.device)
+        return mi.scatter_add_(0, segment, Pxy * torch.log(Pxy / Px / Py)), \
+               h.scatter_add_(0, segment, -Pxy * torch.log(Pxy)), len(cells)
+
+
+    def mi_many(self, base_set: list, candidates: list, targets: list, h_norm=False):
+        """ Batched I([*base_set, c]; targets) for every c in 'candidates', all
+        scored by a single 'batch' call. Same contract as 'mi_frame.mi_many'.
+        """
+        if self.engine != 'torch' or self.tabled or self.cache is not None:
+            return super().mi_many(base_set, candidates, targets, h_norm=h_norm)
+        return self.batch([[*base_set, cc] for cc in candidates], targets, h_norm)[0]
+
+
     @staticmethod
     def pdf_estimation(binned, feat_x: list, feat_y: list, device):
         # Columns to tensor, in the right order + get numeric separator + nsamples
@@ -1,16 +1,40 @@
 
+def onehot_index(cols: list) -> dict:
+    """ Maps the name of every parent feature to the positions of its onehot
+    encoded children in 'cols', relying on the separator character '#'.
+    """
+    index = {}
+    for ii, col in enumerate(cols):
+        index.setdefault(col.split('#')[0], []).append(ii)
+    return index
+
+
+def onehot_children(cols: list, parents: list, index=None) -> list:
+    """ Chooses the onehot encoded children features from a list with the names
+    of their parents, relying on the separator character '#'. Non-encoded
+    features are their own (single) child. Looks parents up in 'index', built
+    by 'onehot_index', if given, instead of scanning all of 'cols'.
+    """
+    if index is None:
+        return [col for col in cols if col.split('#')[0] in parents]
+    positions = [ii for parent in dict.fromkeys(parents) for ii in index.get(parent, ())]
+    return [cols[ii] for ii in sorted(positions)]
+
+
 def onehot_enable(method):
     """ Decorator for the __call__ method inside mi_function to allow one-hot
     encoded features. Chooses the onehot encoded children features from a list
     with the names of their parents, relying on the separator character '#'.
         > Expected parents name: [A1]            <- this is user input
         > Expected children names: [A1#a, A1#b]. <- this is already in the class
+    Parents are looked up in the 'onehot' index of the instance, if it has one.
     """
     def wrapper(instance, feat_x, feat_y, **kwargs):
 
         # Get all children onehot features from their parent names
-        feat_x = [col for col in instance.cols if col.split('#')[0] in feat_x]
-        feat_y = [col for col in instance.cols if col.split('#')[0] in feat_y]
+        index = getattr(instance, 'onehot', None)
+        feat_x = onehot_children(instance.cols, feat_x, index)
+        feat_y = onehot_children(instance.cols, feat_y, index)
 
         # Proceed as usual with the children instead of the parents.
         value = method(instance, feat_x, feat_y, **kwargs)
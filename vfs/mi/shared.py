@@ -0,0 +1,53 @@
+import os
+import copy
+import tempfile
+from contextlib import contextmanager, nullcontext
+import numpy as np
+from .mi_frame import mi_frame
+
+
+def shareable(mi_fun) -> bool:
+    """ Whether 'mi_fun' holds a code matrix which can be published.
+    """
+    return isinstance(mi_fun, mi_frame) and getattr(mi_fun, 'shared', None) is None
+
+
+@contextmanager
+def shared_frame(mi_fun: mi_frame, directory=None):
+    """ Publishes the binned code matrix of 'mi_fun' once, as a memory-mapped
+    file (in RAM-backed /dev/shm where available), and yields a copy of it
+    whose pickles only carry the file path. Worker processes receiving it map
+    the very same pages instead of unpickling their own copy of the data.
+    The file is removed on exit, also if an error is raised.
+
+    # Example
+    with shared_frame(mi_frame(df)) as mi_fun:
+        pool.map(some_function, ...)  # mi_fun sent to workers zero-copy
+    """
+    codes = mi_fun.codes
+    directory = directory or ('/dev/shm' if os.path.isdir('/dev/shm') else None)
+    fd, path = tempfile.mkstemp(prefix='vfs-', suffix='.codes', dir=directory)
+    os.close(fd)
+
+    try:
+        # Write codes to the shared file once
+        segment = np.memmap(path, dtype=codes.dtype, mode='w+', shape=codes.shape, order='F')
+        segment[:] = codes
+        segment.flush()
+        del segment
+
+        # Shallow copy reading from the file. Pickling skips heavy attributes
+        shared = copy.copy(mi_fun)
+        shared.shared = path
+        shared.codes = np.memmap(path, dtype=codes.dtype, mode='r', shape=codes.shape, order='F')
+        yield shared
+
+    finally:
+        os.remove(path)
+
+
+def sharing(mi_fun, enabled=True):
+    """ Context yielding a shared version of 'mi_fun' if it can be shared and
+    'enabled', else 'mi_fun' itself.
+    """
+    return shared_frame(mi_fun) if enabled and shareable(mi_fun) else nullcontext(mi_fun)
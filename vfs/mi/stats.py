@@ -0,0 +1,133 @@
+import json
+import threading
+from time import perf_counter
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class mi_stats:
+    """ Opt-in instrumentation of MI functions and selectors. Collects named
+    counters (eg. calls, rows processed, joint table cells, cache hits), total
+    time spent per named section and a log of events (eg. one per selector
+    iteration). Every event is also passed to the 'callbacks', as
+    callback(name, fields), eg. to forward it to a metrics pipeline.
+
+    # Example
+    stats = mi_stats(callbacks=[lambda name, fields : print(name, fields)])
+    mi_fun = mi_frame(df, stats=stats)
+    forward_selector(df, features, targets, k=3, loss=jmim, mi_fun=mi_fun)
+    stats.save('stats.json')
+
+    Instrumented code only checks whether its 'stats' attribute is None, so
+    it costs close to nothing when disabled. Selectors default to the stats
+    of their 'mi_fun'. Counts from worker processes are not collected back,
+    only the ones of the calling process.
+    """
+    def __init__(self, callbacks=(), max_events=2**16):
+        self.callbacks = list(callbacks)
+        self.max_events = max_events
+        self.counters = defaultdict(int)
+        self.timers = defaultdict(float)
+        self.events = []
+        self.lock = threading.Lock()
+
+
+    def count(self, name: str, value=1):
+        """ Adds 'value' to the counter 'name'.
+        """
+        with self.lock:
+            self.counters[name] += value
+
+
+    def add_time(self, name: str, seconds: float):
+        """ Adds 'seconds' to the timer 'name', counting one more '.calls'.
+        """
+        with self.lock:
+            self.timers[name] += seconds
+            self.counters[f'{name}.calls'] += 1
+
+
+    @contextmanager
+    def timer(self, name: str):
+        """ Times the enclosed block into the timer 'name'.
+        """
+        tic = perf_counter()
+        try:
+            yield self
+        finally:
+            self.add_time(name, perf_counter() - tic)
+
+
+    def event(self, name: str, **fields):
+        """ Logs an event, keeping the latest 'max_events', and passes it to
+        the callbacks.
+        """
+        with self.lock:
+            self.events.append({'event': name, **fields})
+            del self.events[:-self.max_events]
+        for callback in self.callbacks:
+            callback(name, fields)
+
+
+    def clear(self):
+        with self.lock:
+            self.counters.clear()
+            self.timers.clear()
+            self.events.clear()
+
+
+    def to_dict(self) -> dict:
+        """ Snapshot of counters, timers and events, json serializable.
+        """
+        with self.lock:
+            return {'counters': dict(self.counters), 'timers': dict(self.timers),
+                    'events': [dict(event) for event in self.events]}
+
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), default=str, **kwargs)
+
+
+    def save(self, path: str):
+        """ Writes 'to_dict' as a json file.
+        """
+        with open(path, 'w') as fh:
+            fh.write(self.to_json(indent=2))
+
+
+    def __getstate__(self):
+        """ Callbacks may not pickle (eg. lambdas), workers go without them.
+        """
+        state = self.__dict__.copy()
+        del state['lock']
+        state['callbacks'] = []
+        return state
+
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+
+def stats_enable(method):
+    """ Decorator for the __call__ method inside mi_function to time it and
+    count calls and cache hits into the instance's 'stats' attribute, if the
+    instance has one.
+    """
+    def wrapper(instance, feat_x, feat_y, h_norm=False):
+
+        # Fall through if instrumentation was not requested
+        stats = getattr(instance, 'stats', None)
+        if stats is None:
+            return method(instance, feat_x, feat_y, h_norm=h_norm)
+
+        # Time the call, and tell whether the cache answered it
+        cache = getattr(instance, 'cache', None)
+        hits = cache.hits if cache is not None else 0
+        tic = perf_counter()
+        value = method(instance, feat_x, feat_y, h_norm=h_norm)
+        stats.add_time('mi.call', perf_counter() - tic)
+        if cache is not None:
+            stats.count('mi.cache_hits', cache.hits - hits)
+        return value
+    return wrapper
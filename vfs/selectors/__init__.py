@@ -1,6 +1,4 @@
-from pandarallel import pandarallel
-pandarallel.initialize(verbose=0)
-
 from .forward_selector import forward_selector
 from .backward_eliminator import backward_eliminator
 from .exhaustive_searcher import exhaustive_searcher
+from .beam_searcher import beam_searcher
@@ -1,10 +1,16 @@
 import numpy as np
 import pandas as pd
+from time import perf_counter
 from ..mi.mi_frame import mi_frame
+from ..mi.shared import sharing
 from .assertions import check_stuff
+from .executors import executor_backend
+from .scoring import batched, score_candidates
+from .checkpoints import checkpoint_signature, load_checkpoint, save_checkpoint
 
 @check_stuff
-def backward_eliminator(df, features, targets, k=3, loss=None, mi_fun=None):
+def backward_eliminator(df, features, targets, k=3, loss=None, mi_fun=None, executor='auto', workers=None, stats=None,
+                        checkpoint=None):
 
     # Inmutable parameters throughout the whole feature selection
     features: list[str] = list(features)
@@ -17,21 +23,49 @@ def backward_eliminator(df, features, targets, k=3, loss=None, mi_fun=None):
     discarded: list[str] = []
     scores: list[float] = []
 
-    while len(candidates) > kk:
-        # Pack arguments and loss to send to multiprocessing
-        _args = (selected, targets, mi_fun)
-        _loss = loss.choose(first_iter=not selected)
-
-        # Multiprocessing and choose the best feature this iter
-        iter_scores = candidates.feat.parallel_apply(_loss, args=_args)
-        feat  = iter_scores.idxmin()
-        score = iter_scores[feat]
-
-        # Manage selected/discarded/etc
-        candidates.drop(feat, inplace=True)
-        discarded.append(feat)
-        selected.remove(feat)
-        scores.append(score)
+    # Resume progress saved at the 'checkpoint' path by the same selection, if any
+    if checkpoint is not None:
+        signature = checkpoint_signature('backward', mi_fun, features=features, targets=targets, k=kk,
+                                         loss=loss.name)
+        state = load_checkpoint(checkpoint, signature, mi_fun)
+        if state is not None:
+            discarded, scores = state['discarded'], state['scores']
+            candidates.drop(discarded, inplace=True)
+            selected = [ff for ff in selected if ff not in discarded]
+
+    # Optional instrumentation, defaults to that of the MI function
+    stats = stats if stats is not None else getattr(mi_fun, 'stats', None)
+
+    # Backend running the candidate scoring, chosen once for all iterations
+    n_rows = getattr(mi_fun, 'n_samples', 0)
+    runner = executor_backend(executor, workers, len(features), n_rows, batched(loss, mi_fun))
+
+    # Workers map the binned data once, if scoring runs in other processes
+    with sharing(mi_fun, enabled=runner.multiprocess) as mi_fun, runner.bind(mi_fun=mi_fun):
+        while len(candidates) > kk:
+            # Score all candidates (batched or multiprocessing) & choose the best
+            tic = perf_counter()
+            iter_scores = score_candidates(candidates, loss, selected, targets, mi_fun, not selected, runner)
+            scored = perf_counter()
+            feat  = iter_scores.idxmin()
+            score = iter_scores[feat]
+
+            # Manage selected/discarded/etc
+            candidates.drop(feat, inplace=True)
+            discarded.append(feat)
+            selected.remove(feat)
+            scores.append(score)
+
+            # Iteration timings, if instrumented
+            if stats is not None:
+                stats.add_time('backward.scoring', scored - tic)
+                stats.event('backward.iteration', iteration=len(scores), feature=feat, score=float(score),
+                            candidates=len(iter_scores), executor=runner.kind,
+                            scoring_seconds=scored - tic, seconds=perf_counter() - tic)
+
+            # Save progress after every iteration
+            if checkpoint is not None:
+                save_checkpoint(checkpoint, signature, {'discarded': discarded, 'scores': scores}, mi_fun)
 
     # Build summary dataframe with the ranking
     data = np.array([discarded, scores]).T
@@ -0,0 +1,100 @@
+import numpy as np
+from time import perf_counter
+from ..mi.shared import sharing
+from .assertions import check_stuff
+from .scoring import batched, grow
+from . import executors
+
+
+def _expand(task, context):
+    """ Scores the extensions of a beam by each of its candidates, with the MI
+    function and search params in the task context: I([*beam, c]; targets)
+    if there is no loss, else the loss score of c given the beam.
+    """
+    beam, candidates = task
+    mi_fun, targets, loss = context['mi_fun'], context['targets'], context['loss']
+
+    if loss is None:
+        if hasattr(mi_fun, 'mi_many'):
+            return list(mi_fun.mi_many(beam, candidates, targets))
+        return [mi_fun([*beam, cc], targets) for cc in candidates]
+
+    if batched(loss, mi_fun):
+        return list(loss.choose_batch(first_iter=not beam)(candidates, beam, targets, mi_fun))
+    _loss = loss.choose(first_iter=not beam)
+    return [_loss(cc, beam, targets, mi_fun) for cc in candidates]
+
+
+@check_stuff
+def beam_searcher(df, features, targets, k=3, loss=None, mi_fun=None, beam_width=8, top_n=1, executor='auto',
+                  workers=None, stats=None):
+    """ Grows the 'beam_width' best subsets of each size, level by level, up
+    to k features: all extensions of every subset in the beam by one more
+    feature are scored, and the best of them make the next beam. Subsets are
+    scored by their joint MI with the targets, or by the 'loss' score of their
+    last feature given the rest, if any (so beam_width=1 is forward selection).
+    Costs about beam_width * n * k scores, between greedy and exhaustive.
+
+    The same subset reached by different orders is only scored once, as an
+    extension of the best beam reaching it. Beams carry their joint code (see
+    'mi_frame.encode_set'), extended by one feature per level, and are
+    expanded in parallel on the 'executor' backend (see 'executor_backend').
+    Returns the best score, subset and discarded features, or lists of the
+    'top_n' best of them (up to 'beam_width'). Equal scores are ranked by
+    beam and feature order.
+    """
+    assert 0 < top_n <= beam_width, f"Beam search: top_n={top_n} not in [1, beam_width={beam_width}]."
+
+    # Inmutable parameters throughout the whole feature selection
+    features: list[str] = list(features)
+    targets: list[str] = list(targets)
+    kk: int = min(k, len(features)) if k else 1
+    position = {feat: ii for ii, feat in enumerate(features)}
+
+    # Optional instrumentation, defaults to that of the MI function
+    stats = stats if stats is not None else getattr(mi_fun, 'stats', None)
+
+    # Backend expanding the beams, one task per beam
+    executor = 'processes' if executor == 'pandarallel' else executor
+    n_rows = getattr(mi_fun, 'n_samples', 0)
+    runner = executors.executor_backend(executor, workers, len(features) * beam_width, n_rows,
+                                        batched(loss, mi_fun) if loss else hasattr(mi_fun, 'mi_many'))
+
+    # Workers map the binned data once, if expanding runs in other processes
+    beams, scores = [[]], [None]
+    with sharing(mi_fun, enabled=runner.multiprocess) as mi_fun, \
+            runner.bind(mi_fun=mi_fun, targets=targets, loss=loss):
+        for level in range(kk):
+            tic = perf_counter()
+
+            # Extensions of each beam, skipping subsets reached by a better beam
+            seen, tasks = set(), []
+            for beam in beams:
+                members = set(beam)
+                candidates = [ff for ff in features if ff not in members and frozenset([*beam, ff]) not in seen]
+                seen.update(frozenset([*beam, ff]) for ff in candidates)
+                tasks.append((list(beam) if runner.multiprocess else beam, candidates))
+
+            # Score them all & keep the best, ties broken by beam and feature order
+            results = runner.map(_expand, tasks)
+            ranked = sorted((-score, bb, position[ff], ff) for bb, ((__, candidates), beam_scores)
+                            in enumerate(zip(tasks, results)) for ff, score in zip(candidates, beam_scores))
+            ranked = ranked[:beam_width]
+            beams = [grow(beams[bb], ff, mi_fun) for __, bb, __, ff in ranked]
+            scores = [-score for score, __, __, __ in ranked]
+
+            # Level timings, if instrumented
+            if stats is not None:
+                evaluated = sum(len(candidates) for __, candidates in tasks)
+                stats.count('beam.evaluations', evaluated)
+                stats.event('beam.level', level=level + 1, beams=len(tasks), evaluated=evaluated,
+                            best=float(scores[0]), executor=runner.kind, seconds=perf_counter() - tic)
+
+    # Unpack ranked subsets
+    selected = [list(beam) for beam in beams[:top_n]]
+    discarded = [[ff for ff in features if ff not in sel] for sel in selected]
+    scores = [np.float64(score) for score in scores[:top_n]]
+
+    if top_n == 1:
+        return scores[0], selected[0], discarded[0]
+    return scores, selected, discarded
@@ -0,0 +1,86 @@
+from math import comb
+import tqdm
+from .scoring import grow
+
+
+def __greedy_incumbent(features, targets, kk, mi_fun):
+    """ Quick lower bound for the search: the joint MI of the feature set
+    chosen greedily, adding the feature which maximizes I(S+f;Y) each step.
+    """
+    selected, score = [], 0
+    for __ in range(kk):
+        remaining = [ff for ff in features if ff not in selected]
+        scores = __score_leaves(selected, remaining, targets, mi_fun)
+        best = max(range(len(remaining)), key=lambda ii: scores[ii])
+        selected, score = grow(selected, remaining[best], mi_fun), scores[best]
+    return score
+
+
+def __score_leaves(subset, leaves, targets, mi_fun):
+    """ Joint MI of 'subset' plus each of 'leaves', batched if supported.
+    """
+    if hasattr(mi_fun, 'mi_many'):
+        return list(mi_fun.mi_many(subset, leaves, targets))
+    return [mi_fun([*subset, ff], targets) for ff in leaves]
+
+
+def branch_and_bound(features, targets, kk, mi_fun, pbar=True, stats=None):
+    """ Exact search of the k-subset of 'features' with maximal joint MI with
+    'targets'. Since I(S;Y) never decreases when S grows, every subtree holding
+    the completions of a partial subset S is bounded by I(S+rest;Y), with rest
+    the features still available to it. Subtrees whose bound is lower than the
+    best score found so far are pruned.
+
+    Subsets are visited in lexicographic order of 'features', and among equally
+    scored optima the first one is kept, as brute force ranking would.
+    Counters of visited, pruned and evaluated nodes are written into 'stats'.
+    """
+    n = len(features)
+    stats = {} if stats is None else stats
+    stats.update(visited=0, pruned=0, skipped=0, evaluated=0)
+
+    # Progressbar counts leaves, both evaluated and pruned away
+    d: str = f'Branch & Bound Feature Search ({kk} out of {n})'
+    progressbar = tqdm.tqdm(desc=d, total=comb(n, kk), disable=not pbar)
+
+    # Best possible score, and a greedy solution to start pruning right away
+    ceiling = mi_fun(features, targets)
+    best = {'score': __greedy_incumbent(features, targets, kk, mi_fun), 'subset': None}
+    stats['evaluated'] += 1 + sum(n - ii for ii in range(kk))
+
+    def visit(subset: list, start: int):
+        """ Expands all children of 'subset' taking features after 'start'.
+        """
+        stats['visited'] += 1
+        need = kk - len(subset) - 1
+
+        # Children are leaves: score them all at once
+        if need == 0:
+            leaves = features[start:]
+            scores = __score_leaves(subset, leaves, targets, mi_fun)
+            stats['evaluated'] += len(leaves)
+            progressbar.update(len(leaves))
+            for ff, score in zip(leaves, scores):
+                if score > best['score'] or (score == best['score'] and best['subset'] is None):
+                    best.update(score=score, subset=[*subset, ff])
+            return
+
+        # Else bound each child by adding all later features to it
+        for jj in range(start, n - need):
+            if best['subset'] is not None and best['score'] >= ceiling:
+                return
+            bound = mi_fun([*subset, *features[jj:]], targets)
+            stats['evaluated'] += 1
+            if bound < best['score']:
+                stats['pruned'] += 1
+                stats['skipped'] += comb(n - jj - 1, need)
+                progressbar.update(comb(n - jj - 1, need))
+                continue
+            visit(grow(subset, features[jj], mi_fun), jj + 1)
+
+    visit([], 0)
+    progressbar.close()
+
+    selected = list(best['subset'])
+    discarded = [ff for ff in features if ff not in selected]
+    return best['score'], selected, discarded
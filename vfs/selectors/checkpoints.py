@@ -0,0 +1,57 @@
+import os
+import pickle
+import tempfile
+
+
+# Min seconds between checkpoints of selectors saving along long loops
+CHECKPOINT_SECONDS = 60
+
+
+def checkpoint_signature(selector: str, mi_fun, **params) -> dict:
+    """ Identifies a selection: the selector, its params and the dataset of
+    'mi_fun' (see 'mi_frame.fingerprint'), so that a checkpoint is only ever
+    resumed by the very same selection.
+    """
+    fingerprint = mi_fun.fingerprint() if hasattr(mi_fun, 'fingerprint') else None
+    return {'selector': selector, 'data': fingerprint, **params}
+
+
+def load_checkpoint(path, signature: dict, mi_fun=None):
+    """ Progress saved at 'path' by the selection of 'signature', or None if
+    there is no checkpoint yet. The MI cache entries saved along with it are
+    restored into the cache of 'mi_fun', if it has one.
+    """
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path, 'rb') as fh:
+        payload = pickle.load(fh)
+    assert payload['signature'] == signature, f"Checkpoint at '{path}' was saved by another selection."
+
+    cache = getattr(mi_fun, 'cache', None)
+    if cache is not None:
+        for key, value in payload['cache']:
+            cache.put(key, value)
+    return payload['state']
+
+
+def save_checkpoint(path, signature: dict, state: dict, mi_fun=None):
+    """ Saves progress 'state', and the MI cache of 'mi_fun' if any, at 'path'.
+    Written to a temporary file next to it and then renamed over it, so that
+    an interruption leaves the previous checkpoint intact.
+    """
+    cache = getattr(mi_fun, 'cache', None)
+    if cache is not None:
+        with cache.lock:
+            entries = list(cache.store.items())
+    payload = {'signature': signature, 'state': state, 'cache': entries if cache is not None else []}
+
+    fd, temporary = tempfile.mkstemp(prefix='.vfs-', suffix='.ckpt', dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            pickle.dump(payload, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
@@ -0,0 +1,146 @@
+import os
+from functools import partial
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+
+
+# Accepted 'executor=' names. An Executor instance can also be passed
+backends = ('auto', 'serial', 'threads', 'processes', 'pandarallel')
+
+# Below this many rows x tasks, 'auto' runs serially. Batched losses are much
+# cheaper per task, so they need far more work to be worth dispatching
+AUTO_MIN_WORK = {True: 5e7, False: 1e6}
+
+# Context of worker processes, set once per process by the pool initializer.
+# Only ever filled in workers, in-process tasks get that of their own runner
+_context = {}
+
+# Number of workers pandarallel was last initialized with, if any
+_pandarallel_workers = None
+
+
+def set_context(context: dict):
+    """ Pool initializer: stores the task context (eg. the MI function) in the
+    worker process, where '_in_worker' hands it to tasks.
+    """
+    _context.clear()
+    _context.update(context)
+
+
+def _in_worker(fn, item):
+    """ Runs 'fn' in a worker process, on the context of its initializer.
+    """
+    return fn(item, _context)
+
+
+def _bootstrap(context, fn, item):
+    """ Runs 'fn' on a user-provided executor, whose workers were not started
+    with our initializer, so context travels with every task.
+    """
+    return fn(item, context)
+
+
+def init_pandarallel(workers=None):
+    """ Initializes pandarallel the first time it is actually used, or when a
+    different number of workers is requested.
+    """
+    global _pandarallel_workers
+    from pandarallel import pandarallel
+    workers = workers or os.cpu_count()
+    if _pandarallel_workers != workers:
+        pandarallel.initialize(nb_workers=workers, verbose=0)
+        _pandarallel_workers = workers
+
+
+class executor_backend:
+    """ Runs tasks of a selector on the backend chosen by its 'executor' arg:
+        > 'serial':      plain loop in this process.
+        > 'threads':     ThreadPoolExecutor, useful when MI releases the GIL.
+        > 'processes':   ProcessPoolExecutor, kept alive across iterations.
+        > 'pandarallel': candidates.parallel_apply, as originally done.
+        > 'auto':        serial for little work (tasks x rows), else processes.
+        > Executor:      any concurrent.futures executor, managed by the user.
+
+    Tasks are called as fn(item, context). Worker processes receive 'context'
+    once, when started, so that heavy objects such as the MI function are not
+    sent along every task. In-process backends pass the runner's own context,
+    so concurrent runners never share it. Use as a context manager so pools
+    are shut down on exit.
+    """
+    def __init__(self, executor='auto', workers=None, n_tasks=0, n_rows=0, batched=False, context=None):
+        assert isinstance(executor, Executor) or executor in backends, \
+            f"Unknown executor '{executor}', choose from {backends} or pass an Executor."
+
+        # Resolve automatic choice from the amount of work
+        if executor == 'auto':
+            small = n_tasks * n_rows < AUTO_MIN_WORK[bool(batched)] or (workers or os.cpu_count()) < 2
+            executor = 'serial' if small else 'processes'
+
+        self.executor = executor
+        self.workers = workers or os.cpu_count()
+        self.context = context or {}
+        self.pool = None
+
+
+    def bind(self, **context):
+        """ Sets the context handed to workers. Returns self, to chain in 'with'.
+        """
+        self.context = context
+        return self
+
+
+    @property
+    def kind(self) -> str:
+        return 'custom' if isinstance(self.executor, Executor) else self.executor
+
+
+    @property
+    def multiprocess(self) -> bool:
+        """ Whether tasks are run in other processes (ie. data is pickled).
+        """
+        return self.kind in ('processes', 'pandarallel') or isinstance(self.executor, ProcessPoolExecutor)
+
+
+    @property
+    def n_chunks(self) -> int:
+        """ How many pieces to split a batch of tasks into.
+        """
+        return 1 if self.kind == 'serial' else 4 * self.workers
+
+
+    def map(self, fn, items: list) -> list:
+        """ Ordered results of fn(item, context) over 'items' on the chosen backend.
+        """
+        return list(self.imap(fn, items))
+
+
+    def imap(self, fn, items: list):
+        """ Same as 'map', but yields each result as soon as it is available.
+        """
+        if self.kind == 'custom':
+            futures = [self.executor.submit(_bootstrap, self.context, fn, it) for it in items]
+            return (future.result() for future in futures)
+
+        # Pools are started on first use and persist until exit
+        if self.pool is None:
+            if self.kind == 'processes':
+                self.pool = ProcessPoolExecutor(self.workers, initializer=set_context, initargs=(self.context,))
+            else:
+                self.pool = ThreadPoolExecutor(self.workers) if self.kind == 'threads' else False
+
+        # Worker processes hold their context, in-process tasks take ours
+        if self.kind == 'processes':
+            return self.pool.map(partial(_in_worker, fn), items)
+        task = partial(fn, context=self.context)
+        return self.pool.map(task, items) if self.pool else (task(it) for it in items)
+
+
+    def __enter__(self):
+        if self.kind == 'pandarallel':
+            init_pandarallel(self.workers)
+        return self
+
+
+    def __exit__(self, *exc):
+        if self.pool:
+            self.pool.shutdown(cancel_futures=True)
+        self.pool = None
@@ -1,88 +1,198 @@
 import numpy as np
 import pandas as pd
-import multiprocessing as mp
-import itertools
-import queue
+import heapq
 from math import comb
 import tqdm
+from time import perf_counter
 from ..mi.mi_frame import mi_frame
+from ..mi.shared import sharing
+from ..mi.stats import mi_stats
+from .branch_bound import branch_and_bound
+from . import executors
+from .checkpoints import CHECKPOINT_SECONDS, checkpoint_signature, load_checkpoint, save_checkpoint
 
 
-def __scoring(features, targets, function, my_queue):
-    """ Computes a the mutual information score of the given feature and target
-    sets, then places it in the queue.
-    """
-    score = function(features, targets)
-    my_queue.put([features, score])
-    return None
+# Combinations scored per call by MI functions with a 'batch' method
+BATCH_SUBSETS = 4096
+
+# Max combinations per chunk when checkpointing, which happens between chunks
+CHECKPOINT_SUBSETS = 2 ** 16
 
 
-def __maxmonitor(my_queue, signal):
-    """ While signal queue is empty, receive elements from my_queue and keep
-    only the one which has the highest [1] value. After signal is received,
-    end flushing the queue and die.
+def unrank(rank: int, n: int, k: int) -> list:
+    """ Returns the 'rank'-th k-combination of range(n), in the lexicographic
+    order of itertools.combinations.
+    """
+    combo, start = [], 0
+    for slots in range(k, 0, -1):
+        for ii in range(start, n):
+            count = comb(n - ii - 1, slots - 1)
+            if rank < count:
+                combo.append(ii)
+                start = ii + 1
+                break
+            rank -= count
+    return combo
+
+
+def successor(combo: list, n: int):
+    """ Next k-combination of range(n) in lexicographic order, or None if
+    'combo' is the last one.
+    """
+    k, ii = len(combo), len(combo) - 1
+    while ii >= 0 and combo[ii] == n - k + ii:
+        ii -= 1
+    if ii < 0:
+        return None
+    start = combo[ii] + 1
+    return combo[:ii] + list(range(start, start + k - ii))
+
+
+def __scan(bounds, context):
+    """ Scores all combinations with rank in [lo, hi) and keeps a local heap of
+    the 'top_n' best. MI functions with a 'batch' method score blocks of up to
+    BATCH_SUBSETS combinations per call. Else, consecutive combinations sharing
+    all but the last feature are scored together through 'mi_many', if
+    available. The prebinned data and search params are read from the task
+    context, so that tasks only carry their combination index range.
     """
-    # Phase 1: init + standard routine while worker pool is running
-    max_value_yet = [0,0]
-    while signal.empty():
-        try:
-            # Timeout so loop cant get stuck here & stop checking for signal
-            val = my_queue.get(timeout=0.01)
-            if val[1] >= max_value_yet[1]:
-                max_value_yet = val
-        except queue.Empty:
-            continue
-
-    # Phase 2: After getting a signal: flush queue, place maxvalue & die
-    while 1:
-        try:
-            val = my_queue.get(timeout=0.01)
-            if val[1] >= max_value_yet[1]:
-                max_value_yet = val
-        except queue.Empty:
-            my_queue.put(max_value_yet)
-            return None
-
-
-
-def exhaustive_searcher(df, features, targets, k=3, mi_fun=None, pbar=True):
+    lo, hi = bounds
+    features, targets, mi_fun = context['features'], context['targets'], context['mi_fun']
+    n, kk, top_n = len(features), context['kk'], context['top_n']
+
+    heap, rank, combo = [], lo, unrank(lo, n, kk)
+    while rank < hi:
+
+        if hasattr(mi_fun, 'batch'):
+            # Block of the next combinations, all scored in one go
+            combos = [combo]
+            while len(combos) < min(BATCH_SUBSETS, hi - rank):
+                combos.append(successor(combos[-1], n))
+            scores = mi_fun.batch([[features[ii] for ii in cc] for cc in combos], targets)[0]
+
+        else:
+            # Run of combinations which only differ in their last feature
+            prefix = [features[ii] for ii in combo[:-1]]
+            last = list(range(combo[-1], min(n, combo[-1] + hi - rank)))
+            combos = [[*combo[:-1], ii] for ii in last]
+            leaves = [features[ii] for ii in last]
+            if hasattr(mi_fun, 'mi_many'):
+                scores = mi_fun.mi_many(prefix, leaves, targets)
+            else:
+                scores = [mi_fun([*prefix, ff], targets) for ff in leaves]
+
+        # Higher score first, then lower rank, so ties are deterministic
+        for offset, (cc, score) in enumerate(zip(combos, scores)):
+            item = (score, -(rank + offset), cc)
+            if len(heap) < top_n:
+                heapq.heappush(heap, item)
+            else:
+                heapq.heappushpop(heap, item)
+
+        rank += len(combos)
+        combo = successor(combos[-1], n)
+
+    return heap, hi - lo
+
+
+
+def exhaustive_searcher(df, features, targets, k=3, mi_fun=None, pbar=True, search='brute', stats=None,
+                        top_n=1, executor='auto', workers=None, chunksize=None, checkpoint=None):
+        """ Finds the k features with highest joint MI with the targets. With
+        search='brute' all combinations are scored, with search='bnb' an exact
+        branch and bound search prunes those which cannot beat the best found
+        so far. The latter reports visited vs pruned nodes in the 'stats' dict.
+        If 'stats' is an 'mi_stats' (by default that of 'mi_fun', if any), the
+        search throughput is also reported, and node counters go into it.
+
+        Brute force splits the combinations into index ranges, each scanned by
+        a worker of the 'executor' backend (see 'executor_backend', pandarallel
+        is taken as processes) keeping its own top-n heap, all reduced at the
+        end. If 'top_n' > 1, returns lists of the 'top_n' best scores and
+        subsets. Equal scores are ranked by combination order.
+
+        With a 'checkpoint' path, brute force saves the combination rank up to
+        which all have been scored, the heap and the MI cache there, at most
+        every CHECKPOINT_SECONDS and when done. A search started anew with the
+        same arguments resumes from it, with identical results.
+        """
+        assert search in ('brute', 'bnb'), f"Unknown search '{search}', choose 'brute' or 'bnb'."
 
         # Inmutable parameters throughout the whole feature selection
         features: list[str] = list(features)
         targets: list[str] = list(targets)
         kk: int = min(k, len(features)) if k else len(features)
-
-        # Progressbar stuff. Not reliable if too many processes but still helps
-        d: str = f'Exhaustive Feature Search ({kk} out of {len(features)})'
-        n: int = comb(len(features), k)
-        progressbar = lambda x : tqdm.tqdm(x, desc=d, total=n) if pbar else x
-
-
-        # Multiprocessing toys for happy inter-process communication
-        manager = mp.Manager()
-        q_scores = manager.Queue()
-        q_signal = manager.Queue()
-        pool = mp.Pool()
-
-        # Make generator to give to workers
         assert kk > 0, 'Target number of features cannot be zero.'
-        feature_combos = itertools.combinations(features, kk)
-        constant_args = (targets, mi_fun, q_scores)
-        packed_args = ((list(fc), *constant_args) for fc in feature_combos)
-
-        # Supervisor: cleans the score queue of any non-max values in real time
-        supervisor = mp.Process(target=__maxmonitor, args=(q_scores, q_signal))
-        supervisor.start()
-
-        # Have the pool compute the scores & dump them to supervised queue
-        pool.starmap_async(__scoring, progressbar(packed_args))
-        pool.close()
-        pool.join()
-
-        # After workers finish, have the supervisor flush queue and terminate
-        q_signal.put('flush')
-        supervisor.join()
-        selected, scores = q_scores.get()
-        discarded = [features.remove(ii) for ii in selected]
 
+        # Optional instrumentation, defaults to that of the MI function
+        stats = stats if stats is not None else getattr(mi_fun, 'stats', None)
+        instrumented = isinstance(stats, mi_stats)
+        tic = perf_counter()
+
+        # Pruned search runs in-process, no supervisor needed
+        if search == 'bnb':
+            assert top_n == 1, 'Branch and bound search only finds the top subset.'
+            assert checkpoint is None, 'Branch and bound search can not be checkpointed.'
+            counters = {} if instrumented else stats
+            result = branch_and_bound(features, targets, kk, mi_fun, pbar, counters)
+            if instrumented:
+                for name, value in counters.items():
+                    stats.count(f'exhaustive.{name}', value)
+                stats.event('exhaustive.search', search=search, subsets=counters['evaluated'],
+                            seconds=perf_counter() - tic)
+            return result
+
+        # Backend scanning the combinations
+        n: int = comb(len(features), kk)
+        executor = 'processes' if executor == 'pandarallel' else executor
+        n_rows = getattr(mi_fun, 'n_samples', 0)
+        runner = executors.executor_backend(executor, workers, n, n_rows, hasattr(mi_fun, 'mi_many'))
+
+        # Resume from the rank reached by the same search, if checkpointed
+        start, heap = 0, []
+        if checkpoint is not None:
+            signature = checkpoint_signature('exhaustive', mi_fun, features=features, targets=targets, k=kk,
+                                             top_n=top_n)
+            state = load_checkpoint(checkpoint, signature, mi_fun)
+            start, heap = (state['rank'], state['heap']) if state is not None else (start, heap)
+
+        # Split the combination space into index ranges, a few per worker
+        size: int = chunksize or max(1, -(-(n - start) // runner.n_chunks))
+        size = min(size, CHECKPOINT_SUBSETS) if checkpoint is not None else size
+        chunks = [(lo, min(n, lo + size)) for lo in range(start, n, size)]
+
+        # Progressbar stuff. Counts combinations as chunks are completed
+        d: str = f'Exhaustive Feature Search ({kk} out of {len(features)})'
+        progressbar = tqdm.tqdm(desc=d, total=n, initial=start, disable=not pbar)
+
+        # Scan chunks, worker processes map the shared binned data once
+        saved = perf_counter()
+        with sharing(mi_fun, enabled=runner.multiprocess) as shared:
+            context = dict(features=features, targets=targets, kk=kk, mi_fun=shared, top_n=top_n)
+            with runner.bind(**context):
+                for (__, hi), (local_heap, done) in zip(chunks, runner.imap(__scan, chunks)):
+                    heap = heapq.nlargest(top_n, heap + local_heap)
+                    progressbar.update(done)
+
+                    # Chunks complete in order, so all ranks below 'hi' are scored
+                    if checkpoint is not None and (hi == n or perf_counter() - saved > CHECKPOINT_SECONDS):
+                        save_checkpoint(checkpoint, signature, {'rank': hi, 'heap': heap}, mi_fun)
+                        saved = perf_counter()
+        progressbar.close()
+
+        # Search throughput, if instrumented
+        if instrumented:
+            seconds = perf_counter() - tic
+            stats.count('exhaustive.subsets', n)
+            stats.add_time('exhaustive.search', seconds)
+            stats.event('exhaustive.search', search=search, subsets=n, chunks=len(chunks), executor=runner.kind,
+                        seconds=seconds, subsets_per_second=n / seconds)
+
+        # Unpack ranked subsets
+        scores = [score for score, __, __ in heap]
+        selected = [[features[ii] for ii in combo] for __, __, combo in heap]
+        discarded = [[ff for ff in features if ff not in sel] for sel in selected]
+
+        if top_n == 1:
+            return scores[0], selected[0], discarded[0]
         return scores, selected, discarded
@@ -1,10 +1,40 @@
+import math
+import heapq
 import numpy as np
 import pandas as pd
+from time import perf_counter
 from ..mi.mi_frame import mi_frame
+from ..mi.shared import sharing
 from .assertions import check_stuff
+from .executors import executor_backend
+from .scoring import batched, score_candidates, grow, lazy_best
+from .checkpoints import checkpoint_signature, load_checkpoint, save_checkpoint
 
 @check_stuff
-def forward_selector(df, features, targets, k=3, loss=None, mi_fun=None):
+def forward_selector(df, features, targets, k=3, loss=None, mi_fun=None, executor='auto', workers=None, stats=None,
+                     strategy='greedy', candidate_sample=None, seed=0, shortlist=None, shortlist_rows=0.1,
+                     checkpoint=None):
+    """ Greedily adds the candidate of best 'loss' score to the selected set,
+    until it holds k features. Every candidate is scored each iteration,
+    unless:
+        > strategy='lazy': only the top candidates are re-scored, with the
+          same result, for losses with 'diminishing' scores (see lazy_best).
+        > candidate_sample: stochastic greedy, scores a random sample of the
+          candidates each iteration, of (n/k) log(1/eps) of them if given
+          eps < 1, else of 'candidate_sample' of them. Drawn with 'seed'.
+        > shortlist: keeps only the 'shortlist' candidates of best first
+          iteration score on a sample of 'shortlist_rows' rows of 'mi_fun'
+          (a fraction if below 1), see 'mi_frame.subsample', beforehand.
+
+    With a 'checkpoint' path, progress and the MI cache are saved there after
+    every iteration, and a selection started anew with the same arguments
+    resumes from it, with identical results.
+    """
+    assert strategy in ('greedy', 'lazy'), f"Unknown strategy '{strategy}', choose 'greedy' or 'lazy'."
+    assert strategy != 'lazy' or getattr(loss, 'diminishing', False), \
+        f"Lazy forward selection needs a loss with diminishing scores, not {loss.name}."
+    assert strategy != 'lazy' or candidate_sample is None, "Lazy forward selection can't sample candidates."
+    assert candidate_sample is None or candidate_sample > 0, f"Invalid candidate sample: {candidate_sample}."
 
     # Inmutable parameters throughout the whole feature selection
     features: list[str] = list(features)
@@ -16,25 +46,95 @@ def forward_selector(df, features, targets, k=3, loss=None, mi_fun=None):
     selected: list[str] = []
     scores: list[float] = []
 
-    while len(selected) < kk:
+    # Lazy strategy: heap of stale scores, upper bounds of the current ones
+    bounds: list = []
+    position = {feat: ii for ii, feat in enumerate(features)}
+    evaluations = 0
+
+    # Checkpoints are only resumed by the same selection
+    if checkpoint is not None:
+        signature = checkpoint_signature('forward', mi_fun, features=features, targets=targets, k=kk,
+                                         loss=loss.name, strategy=strategy, candidate_sample=candidate_sample,
+                                         seed=seed, shortlist=shortlist, shortlist_rows=shortlist_rows)
+        state = load_checkpoint(checkpoint, signature, mi_fun)
+
+    # Stochastic greedy: candidates scored per iteration, a count even if given as a float
+    rng = np.random.default_rng(seed)
+    if candidate_sample is not None:
+        candidate_sample = math.ceil(len(features) / kk * math.log(1 / candidate_sample)) \
+            if candidate_sample < 1 else int(candidate_sample)
+
+    # Optional instrumentation, defaults to that of the MI function
+    stats = stats if stats is not None else getattr(mi_fun, 'stats', None)
+
+    # Resume progress, else shortlist candidates by their first scores on a sample of rows
+    if checkpoint is not None and state is not None:
+        candidates = candidates.loc[state['candidates']]
+        for feat in state['selected']:
+            selected = grow(selected, feat, mi_fun)
+        scores, bounds, evaluations = state['scores'], state['bounds'], state['evaluations']
+        rng.bit_generator.state = state['rng']
+    elif shortlist is not None and shortlist < len(features):
+        assert hasattr(mi_fun, 'subsample'), "Shortlisting candidates needs an MI function with 'subsample'."
+        first_scores = score_candidates(candidates, loss, [], targets, mi_fun.subsample(shortlist_rows, seed), True)
+        candidates = candidates[candidates.feat.isin(first_scores.nlargest(shortlist).index)]
+        evaluations += len(first_scores)
+
+    # Backend running the candidate scoring, chosen once for all iterations
+    n_rows = getattr(mi_fun, 'n_samples', 0)
+    runner = executor_backend(executor, workers, len(features), n_rows, batched(loss, mi_fun))
+
+    # Workers map the binned data once, if scoring runs in other processes
+    with sharing(mi_fun, enabled=runner.multiprocess) as mi_fun, runner.bind(mi_fun=mi_fun):
+        while len(selected) < kk:
+
+            # Score all candidates (batched or multiprocessing) & choose the best
+            tic = perf_counter()
+            if bounds:
+                feat, score, evaluated = lazy_best(bounds, loss, selected, targets, mi_fun)
+            else:
+                pool = candidates
+                if candidate_sample is not None and candidate_sample < len(candidates):
+                    pool = candidates.iloc[np.sort(rng.choice(len(candidates), candidate_sample, replace=False))]
+                iter_scores = score_candidates(pool, loss, selected, targets, mi_fun, not selected, runner)
+                feat  = iter_scores.idxmax()
+                score = iter_scores[feat]
+                evaluated = len(iter_scores)
+
+                # Scores bound later ones if the loss stays the same from now on
+                if strategy == 'lazy' and (selected or loss.choose(first_iter=True) is loss.choose()):
+                    bounds = [(-sc, position[ff], ff, len(selected)) for ff, sc in iter_scores.items() if ff != feat]
+                    heapq.heapify(bounds)
+            scored = perf_counter()
+            evaluations += evaluated
 
-        # Pack arguments and loss to send to multiprocessing
-        _args = (selected, targets, mi_fun)
-        _loss = loss.choose(first_iter=not selected)
+            # Manage selected/discarded/etc
+            candidates.drop(feat, inplace=True)
+            selected = grow(selected, feat, mi_fun)
+            scores.append(score)
 
-        # Multiprocessing and choose the best feature this iter
-        iter_scores = candidates.feat.parallel_apply(_loss, args=_args)
-        feat  = iter_scores.idxmax()
-        score = iter_scores[feat]
+            # Iteration timings, if instrumented
+            if stats is not None:
+                stats.add_time('forward.scoring', scored - tic)
+                stats.event('forward.iteration', iteration=len(scores), feature=feat, score=float(score),
+                            candidates=evaluated, executor=runner.kind,
+                            scoring_seconds=scored - tic, seconds=perf_counter() - tic)
 
-        # Manage selected/discarded/etc
-        candidates.drop(feat, inplace=True)
-        selected.append(feat)
-        scores.append(score)
+            # Save progress, all that is needed to go on from here
+            if checkpoint is not None:
+                state = {'candidates': candidates.feat.to_list(), 'selected': list(selected), 'scores': scores,
+                         'bounds': bounds, 'evaluations': evaluations, 'rng': rng.bit_generator.state}
+                save_checkpoint(checkpoint, signature, state, mi_fun)
 
     # Build summary dataframe with the ranking + discarded set
+    selected = list(selected)
     data = np.array([selected, scores]).T
     summary = pd.DataFrame(data, columns=['Selected', loss.name])
+    saved = sum(len(features) - ii for ii in range(kk)) - evaluations
+    summary.attrs.update(evaluations=evaluations, evaluations_saved=saved)
+    if stats is not None:
+        stats.count('forward.evaluations', evaluations)
+        stats.count('forward.evaluations_saved', saved)
     discarded = features; [discarded.remove(i) for i in selected]
 
     return summary, selected, discarded
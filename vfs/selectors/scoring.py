@@ -0,0 +1,78 @@
+import heapq
+import numpy as np
+import pandas as pd
+from . import executors
+
+
+def batched(loss, mi_fun) -> bool:
+    """ Whether candidates can be scored in a single vectorized pass.
+    """
+    return hasattr(loss, 'choose_batch') and hasattr(mi_fun, 'mi_many')
+
+
+def _score_chunk(task, context):
+    """ Scores a chunk of candidates with the MI function in the task context,
+    in a single call for batch losses or one call per candidate otherwise.
+    """
+    chunk, _loss, batch, selected, targets = task
+    mi_fun = context['mi_fun']
+    if batch:
+        return list(_loss(chunk, selected, targets, mi_fun))
+    return [_loss(cc, selected, targets, mi_fun) for cc in chunk]
+
+
+def score_candidates(candidates: pd.DataFrame, loss, selected, targets, mi_fun, first_iter=False, runner=None):
+    """ Scores every candidate feature with the given loss on the 'runner'
+    executor backend (serial if not given). Uses the loss batch entry point
+    when both the loss and the MI function support it, so each chunk of
+    candidates is scored in a single vectorized pass. With the 'pandarallel'
+    backend falls back to one loss call per candidate through parallel_apply.
+    """
+    runner = runner or executors.executor_backend('serial').bind(mi_fun=mi_fun)
+
+    if runner.kind == 'pandarallel':
+        # Pack arguments and loss to send to multiprocessing, sans joint codes
+        _args = (list(selected), targets, mi_fun)
+        _loss = loss.choose(first_iter=first_iter)
+        return candidates.feat.parallel_apply(_loss, args=_args)
+
+    # Joint codes only pay off in-process, workers would unpickle them instead
+    batch = batched(loss, mi_fun)
+    _loss = loss.choose_batch(first_iter=first_iter) if batch else loss.choose(first_iter=first_iter)
+    selected = list(selected) if runner.multiprocess else selected
+
+    # Split candidates in chunks for the backend & gather scores in order
+    chunks = [cc.tolist() for cc in np.array_split(candidates.feat.to_numpy(), runner.n_chunks) if len(cc)]
+    results = runner.map(_score_chunk, [(cc, _loss, batch, selected, targets) for cc in chunks])
+    return pd.Series([score for chunk in results for score in chunk], index=candidates.index)
+
+
+def grow(selected: list, feat: str, mi_fun) -> list:
+    """ Appends 'feat' to the selected set. If the MI function can encode
+    feature sets, the joint code of the selected set is carried over and
+    extended by the new feature only, instead of being rebuilt every time.
+    """
+    if hasattr(mi_fun, 'encode_set'):
+        return mi_fun.encode_set([*selected, feat], parent=selected)
+    return [*selected, feat]
+
+
+def lazy_best(bounds: list, loss, selected, targets, mi_fun):
+    """ Lazy greedy choice of the best candidate, for losses whose scores only
+    shrink as the selected set grows ('diminishing'). 'bounds' is a heap of
+    (-score, position, feat, n_selected) items, whose stale scores of former
+    iterations are upper bounds of the current ones. Only the top candidate
+    is re-scored, until a fresh score stays on top, which is then the exact
+    best (ties going to the lowest position, as with a full scoring). Returns
+    the best candidate, popped off the heap, its score and the number of
+    candidates scored.
+    """
+    _loss = loss.choose(first_iter=not selected)
+    evaluated = 0
+    while True:
+        bound, position, feat, stamp = heapq.heappop(bounds)
+        if stamp == len(selected):
+            return feat, -bound, evaluated
+        score = _loss(feat, selected, targets, mi_fun)
+        evaluated += 1
+        heapq.heappush(bounds, (-score, position, feat, len(selected)))
@@ -6,6 +6,7 @@ from .selectors import *
 FS = forward_selector
 BE = backward_eliminator
 ES = exhaustive_searcher
+BS = beam_searcher
 
 
 def MIM(df, features, targets, k=3, mi_fun=None):
@@ -48,4 +49,4 @@ def df_iris(rename=True):
     return df, features, targets
 
 
-__all__ = [MIM, DISR, JMI, JMIM, MRMR, NJMIM, df_iris, FS, BE, ES]
+__all__ = ['MIM', 'DISR', 'JMI', 'JMIM', 'MRMR', 'NJMIM', 'df_iris', 'FS', 'BE', 'ES', 'BS']